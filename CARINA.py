@@ -20,23 +20,39 @@
 
 # Adaptaciones en el código ✔ Se ejecuta en paralelo (threading), permitiendo que anytime_planning genere el plan mientras stop_reasoning monitorea el razonamiento. ✔ La historia de rendimiento (performance_history) se usa para predecir la calidad futura, en lugar de un perfil precompilado. ✔ La condición de parada (stop_reasoning) sigue la comparación entre utilidad actual y proyectada, como en el documento. ✔ Se introduce una penalización del tiempo exponencial, alineando mejor el criterio de interrupción del razonamiento.
 
+import math
 import time
 import threading
-import numpy as np
+from performance_predictor import OnlinePerformancePredictor  # Solo stdlib; NumPy se carga con el historial
 
 class SharedMemory:
     """Espacio de memoria compartida entre Object Level y Meta Level."""
 
-    def __init__(self):
+    def __init__(self, history_capacity=256, history_max_len=None):
         self.memory = {}  # Almacén de datos cognitivos
+        self._lock = threading.Lock()  # Object Level y Meta Level escriben desde hilos distintos
+        self._history_options = (history_capacity, history_max_len)
+        self._history = None
+
+    @property
+    def history(self):
+        """Historial (timestamp, calidad); se crea en el primer uso para no importar NumPy al cargar el módulo."""
+        if self._history is None:
+            from performance_history import PerformanceHistory
+            with self._lock:
+                if self._history is None:
+                    self._history = PerformanceHistory(*self._history_options)
+        return self._history
 
     def update(self, key, value):
         """Actualiza un valor en la memoria compartida."""
-        self.memory[key] = value
+        with self._lock:
+            self.memory[key] = value
 
     def read(self, key):
         """Lee un valor de la memoria compartida."""
-        return self.memory.get(key, None)
+        with self._lock:
+            return self.memory.get(key, None)
 
 class ObjectLevel:
     """Nivel Cognitivo - Ejecuta funciones cognitivas y mantiene el modelo del mundo."""
@@ -46,29 +62,30 @@ class ObjectLevel:
         self.current_plan = []
         self.running = True
         self.start_time = time.time()
+        self.predictor = OnlinePerformancePredictor("log_linear")  # Ajuste log-lineal incremental sobre el índice de paso
 
     def performance_predictor(self):
         """Predice el rendimiento futuro basado en el historial."""
-        history = self.shared_memory.read("performance_history")
-        if history is None or len(history) < 2:
-            return np.inf
-
-        x = np.arange(len(history))
-        y = np.array(history)
+        n_steps = self.predictor.n_observations
+        if n_steps < 2:
+            return math.inf
 
-        coef = np.polyfit(x, np.log(y + 1), 1)
-        predicted_next_quality = np.exp(coef[0] * (len(x) + 1) + coef[1]) - 1
-
-        return predicted_next_quality
+        return self.predictor.predict(n_steps + 1)
 
     def anytime_planning(self, goal):
         """Ejecuta planificación incremental mientras el razonamiento está activo."""
         while self.running:
+            if self.shared_memory.read("goal") == "stop":
+                # The Meta Level asked to stop reasoning
+                self.running = False
+                break
+
             elapsed_time = time.time() - self.start_time
             new_step = f"Step {len(self.current_plan) + 1} towards {goal}"
             self.current_plan.append(new_step)
 
-            self.shared_memory.update("performance_history", [len(self.current_plan)])
+            self.shared_memory.history.append(elapsed_time, len(self.current_plan))
+            self.predictor.update(len(self.current_plan) - 1, len(self.current_plan))
             self.shared_memory.update("current_quality", len(self.current_plan))
 
             time.sleep(0.5)
@@ -83,12 +100,12 @@ class MetaLevel:
     def calculate_utility(self, quality, time_elapsed):
         """Calcula la utilidad penalizando el tiempo, asegurando valores numéricos."""
         intrinsic_value = float(quality)  # Convertir calidad a número
-        time_cost = np.exp(time_elapsed * 0.05)  # Penalización exponencial
+        time_cost = math.exp(time_elapsed * 0.05)  # Penalización exponencial
         return intrinsic_value - time_cost
 
     def update_model_of_the_self(self):
         """Actualiza el modelo interno con los valores del Object Level."""
-        self.model_of_the_self["performance_history"] = self.shared_memory.read("performance_history")
+        self.model_of_the_self["performance_history"] = self.shared_memory.history.snapshot()
         self.model_of_the_self["current_quality"] = self.shared_memory.read("current_quality")
 
     def stop_reasoning(self):
@@ -98,7 +115,8 @@ class MetaLevel:
             self.update_model_of_the_self()
 
             elapsed_time = time.time() - self.shared_memory.read("start_time")
-            predicted_quality = float(self.model_of_the_self.get("performance_history", [0])[-1])
+            last_sample = self.shared_memory.history.last()
+            predicted_quality = last_sample[1] if last_sample is not None else 0.0
 
             # Asegurar que los valores sean numéricos
             current_quality = float(self.model_of_the_self["current_quality"])
@@ -138,7 +156,7 @@ class CARINA:
         planning_thread.join()
         monitoring_thread.join()
 
-        return self.shared_memory.read("performance_history")
+        return self.shared_memory.history.qualities()
 
 
 
@@ -150,8 +168,13 @@ class IntelligentTutoringSystem:
         learning_plan = self.mind.execute(goal)
         return learning_plan
 
-# Instanciación y ejecución del agente CARINA
-tutor = IntelligentTutoringSystem()
-goal = "Aprender inteligencia artificial"
-learning_plan = tutor.execute(goal)
-print(f"Plan final: {learning_plan}")
\ No newline at end of file
+def main(goal="Aprender inteligencia artificial"):
+    """Instanciación y ejecución del agente CARINA."""
+    tutor = IntelligentTutoringSystem()
+    learning_plan = tutor.execute(goal)
+    print(f"Plan final: {learning_plan}")
+    return learning_plan
+
+
+if __name__ == "__main__":
+    main()
@@ -1,160 +1,499 @@
+import copy
+import heapq
+import itertools
+import multiprocessing
+import multiprocessing.connection
+import queue
 import time
 import threading
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
 import numpy as np
-import matplotlib.pyplot as plt # For plotting
+from carina_clock import RealClock
+from checkpoint import SessionCheckpointer, check_planner, read_checkpoint, restore_session, resume_options
+from performance_history import PerformanceHistory
+from performance_predictor import OnlinePerformancePredictor
+from planners import StepCountPlanner
+from process_memory import ProcessSharedMemory
+from telemetry import TelemetryRecorder
 
 class SharedMemory:
-    """Espacio de memoria compartida entre Object Level y Meta Level."""
-    def __init__(self):
-        self.memory = {}
-        self._lock = threading.Lock()
+    """Espacio de memoria compartida entre Object Level y Meta Level.
+
+    Las claves se reparten en franjas (lock striping), cada una con su lock, sus valores y
+    un contador de versión por clave. update_many/read_many toman los locks de las franjas
+    implicadas en orden creciente, así que un lote se escribe o se lee de forma atómica.
+    """
+    def __init__(self, history_capacity=256, history_max_len=None, stripes=16):
+        self._locks = [threading.Lock() for _ in range(max(1, stripes))]
+        self._values = [{} for _ in self._locks]
+        self._versions = [{} for _ in self._locks]
+        # Append-only (timestamp, quality) history; single writer, zero-copy snapshot reads
+        self.history = PerformanceHistory(history_capacity, history_max_len)
+        # One condition per watched key, sharing its stripe lock, so writers wake waiters immediately
+        self._conditions = {}
+
+    def _stripe(self, key):
+        return hash(key) % len(self._locks)
+
+    def _store(self, stripe, key, value):
+        # Caller holds the stripe lock
+        self._values[stripe][key] = value
+        version = self._versions[stripe].get(key, 0) + 1
+        self._versions[stripe][key] = version
+        condition = self._conditions.get(key)
+        if condition is not None:
+            condition.notify_all()
+        return version
+
+    def _locked_stripes(self, keys):
+        # Sorted acquisition order keeps concurrent batches deadlock-free
+        stripes = sorted({self._stripe(key) for key in keys})
+        for stripe in stripes:
+            self._locks[stripe].acquire()
+        return stripes
+
+    def _release(self, stripes):
+        for stripe in reversed(stripes):
+            self._locks[stripe].release()
 
     def update(self, key, value):
-        with self._lock:
-            self.memory[key] = value
+        """Escribe un valor y devuelve su nueva versión."""
+        stripe = self._stripe(key)
+        with self._locks[stripe]:
+            return self._store(stripe, key, value)
 
     def read(self, key):
-        with self._lock:
-            return self.memory.get(key, None)
+        stripe = self._stripe(key)
+        with self._locks[stripe]:
+            return self._values[stripe].get(key, None)
+
+    def read_versioned(self, key):
+        """Devuelve (valor, versión); la versión es 0 si la clave nunca se escribió."""
+        stripe = self._stripe(key)
+        with self._locks[stripe]:
+            return self._values[stripe].get(key, None), self._versions[stripe].get(key, 0)
+
+    def compare_and_swap(self, key, expected_version, value):
+        """Escribe solo si la versión actual es expected_version; devuelve (escrito, versión actual)."""
+        stripe = self._stripe(key)
+        with self._locks[stripe]:
+            version = self._versions[stripe].get(key, 0)
+            if version != expected_version:
+                return False, version
+            return True, self._store(stripe, key, value)
+
+    def update_many(self, values):
+        """Escribe varias claves de forma atómica; devuelve {clave: nueva versión}."""
+        stripes = self._locked_stripes(values)
+        try:
+            return {key: self._store(self._stripe(key), key, value) for key, value in values.items()}
+        finally:
+            self._release(stripes)
+
+    def read_many(self, keys):
+        """Lee varias claves como una instantánea consistente; devuelve {clave: valor}."""
+        stripes = self._locked_stripes(keys)
+        try:
+            return {key: self._values[self._stripe(key)].get(key, None) for key in keys}
+        finally:
+            self._release(stripes)
+
+    def wait_for(self, key, predicate=bool, timeout=None):
+        """Bloquea hasta que predicate(valor) se cumpla o expire el timeout; devuelve el valor actual."""
+        stripe = self._stripe(key)
+        values = self._values[stripe]
+        with self._locks[stripe]:
+            condition = self._conditions.get(key)
+            if condition is None:
+                condition = self._conditions[key] = threading.Condition(self._locks[stripe])
+            condition.wait_for(lambda: predicate(values.get(key)), timeout)
+            return values.get(key, None)
 
 class ObjectLevel:
     """Nivel Cognitivo - Ejecuta funciones cognitivas y mantiene el modelo del mundo."""
-    def __init__(self, shared_memory):
+    def __init__(self, shared_memory, max_iterations=60, step_interval=0.5, clock=None, verbose=True, planner=None):
         self.shared_memory = shared_memory
+        self.clock = clock or RealClock()
+        # Any planners.AnytimePlanner; the default keeps the original one-step-per-cycle plan
+        self.planner = planner or StepCountPlanner()
+        self._planning_goal = None
         self.current_plan = []
+        self.first_step_delay = 0.0  # Set when resuming from a checkpoint, to keep the step cadence
         self.running = True
         self.start_time = self.shared_memory.read("start_time")
-
-    def anytime_planning(self, goal):
-        print(f"ObjectLevel: Starting anytime_planning for '{goal}'")
-        iteration_count = 0
+        self.iteration_count = 0
         # Increased max_iterations to allow more time for utility dynamics to play out
-        max_iterations = 60 # e.g., for 30 seconds of planning if sleep is 0.5s
-
-        while self.running and iteration_count < max_iterations:
-            elapsed_time = time.time() - self.start_time
-            new_step = f"Step {len(self.current_plan) + 1} towards {goal}"
-            self.current_plan.append(new_step)
-            current_quality = float(len(self.current_plan))
-
-            history_qualities = self.shared_memory.read("performance_history_qualities") or []
-            history_qualities.append(current_quality)
-            self.shared_memory.update("performance_history_qualities", history_qualities)
-            self.shared_memory.update("current_quality", current_quality)
-            self.shared_memory.update("current_plan_length", len(self.current_plan))
-
-            # print(f"ObjectLevel: Plan step {len(self.current_plan)}, Quality: {current_quality}, Time: {elapsed_time:.2f}s")
-            time.sleep(0.5)
-            iteration_count += 1
-            if self.shared_memory.read("stop_signal"):
-                print("ObjectLevel: Received stop signal.")
-                self.running = False
-                break
-        print(f"ObjectLevel: Anytime planning stopped. Plan length: {len(self.current_plan)}")
+        self.max_iterations = max_iterations # e.g., 60 for 30 seconds of planning if the step interval is 0.5s
+        self.step_interval = step_interval
+        self.verbose = verbose
+
+    def _log(self, message):
+        if self.verbose:
+            print(message)
+
+    def planning_step(self, goal):
+        """Ejecuta un paso de planificación incremental y publica la calidad resultante."""
+        if self._planning_goal != goal:
+            self.planner.start(goal)
+            self._planning_goal = goal
+        improving = self.planner.step()
+        elapsed_time = self.clock.time() - self.start_time
+        self.current_plan = self.planner.best_plan()
+        current_quality = float(self.planner.quality())
+
+        self.shared_memory.history.append(elapsed_time, current_quality)
+        self.shared_memory.update_many({"current_quality": current_quality,
+                                        "current_plan_length": len(self.current_plan)})
+        self.iteration_count += 1
+        if not improving:
+            self._log("ObjectLevel: Planner cannot improve the plan any further.")
+            self.running = False
+        # self._log(f"ObjectLevel: Plan step {len(self.current_plan)}, Quality: {current_quality}, Time: {elapsed_time:.2f}s")
+
+    def halt(self):
+        """Atiende la señal de parada del Meta Level."""
+        self.shared_memory.update("halt_time", time.perf_counter())
+        self._log("ObjectLevel: Received stop signal.")
+        self.running = False
+
+    def can_continue(self):
+        """Comprueba la señal de parada y el límite de iteraciones antes del siguiente paso."""
+        if self.running and self.shared_memory.read("stop_signal"):
+            self.halt()
+        return self.running and self.iteration_count < self.max_iterations
+
+    def finish_planning(self):
+        self._log(f"ObjectLevel: Anytime planning stopped. Plan length: {len(self.current_plan)}")
         self.shared_memory.update("final_plan", self.current_plan)
 
+    def anytime_planning(self, goal):
+        self._log(f"ObjectLevel: Starting anytime_planning for '{goal}'")
+        try:
+            if self.first_step_delay > 0 and self.shared_memory.wait_for("stop_signal", timeout=self.first_step_delay):
+                self.halt()
+            while self.running and self.iteration_count < self.max_iterations:
+                self.planning_step(goal)
+                # Wait out the step, but wake as soon as the MetaLevel raises the stop signal
+                if self.shared_memory.wait_for("stop_signal", timeout=self.step_interval):
+                    self.halt()
+                    break
+        finally:
+            # Even if the planner raises, publish the best plan so far and release the MetaLevel
+            self.finish_planning()
+            self.shared_memory.update("object_level_running_flag", False)
+
+
+# Margin past minimum_run_time_before_stop for an adaptive tick, as the stop test requires elapsed > minimum
+_AFTER_MINIMUM_RUN_TIME = 1e-6
+
 
 class MetaLevel:
     """Nivel Metacognitivo - Supervisa y controla el Object Level."""
-    def __init__(self, shared_memory):
+    def __init__(self, shared_memory, monitoring_interval=0.6, minimum_run_time_before_stop=2.0,
+                 time_cost_exponent_factor=0.15, predictor_family="saturating_exponential",
+                 predictor_forgetting=0.9, telemetry_max_points=None, clock=None, verbose=True,
+                 adaptive_interval=False, min_monitoring_interval=None, max_monitoring_interval=None):
         self.shared_memory = shared_memory
+        self.clock = clock or RealClock()
         self.model_of_the_self = {}
-        self.plot_data = {
-            "times": [],
-            "qualities": [],
-            "intrinsic_values": [],
-            "time_costs": [],
-            "total_utilities": [],
-            "optimal_stop_time": None,
-            "optimal_stop_utility": None,
-            "optimal_stop_quality": None
-        }
+        # Streaming quality model fed with the history samples seen since the previous tick
+        self.performance_predictor = OnlinePerformancePredictor(predictor_family, predictor_forgetting)
+        self._history_cursor = 0
+        # Columnar per-tick telemetry; telemetry_max_points bounds it by decimation on long runs
+        self.plot_data = TelemetryRecorder(max_points=telemetry_max_points)
+        # Callables receiving plot_data after every recorded tick and at the end (e.g. plotting.LivePlot.update)
+        self.tick_listeners = []
         self.start_time = self.shared_memory.read("start_time")
         self.object_level_running = True
+        self.monitoring_interval = monitoring_interval
+        # Adaptive mode spaces ticks by the predicted time left until the utility optimum
+        self.adaptive_interval = adaptive_interval
+        self.min_monitoring_interval = min_monitoring_interval if min_monitoring_interval is not None else monitoring_interval / 4
+        self.max_monitoring_interval = max_monitoring_interval if max_monitoring_interval is not None else monitoring_interval * 4
+        self.next_interval = monitoring_interval
+        self.monitoring_ticks = 0
+        self._tick_recorded = False
+        self.monitoring_cpu_time = 0.0
+        self._interval_sum = 0.0
+        self._interval_min = float("inf")
+        self._interval_max = 0.0
+        # Small delay before stopping is allowed, to let curves develop
+        self.minimum_run_time_before_stop = minimum_run_time_before_stop # seconds
+        # Increased time_cost_exponent_factor to make cost of time more significant
+        self.time_cost_exponent_factor = time_cost_exponent_factor # << ADJUST THIS VALUE (e.g., 0.1, 0.15, 0.2)
+        self.verbose = verbose
+
+    def _log(self, message):
+        if self.verbose:
+            print(message)
 
     def calculate_utility_components(self, quality, time_elapsed):
         intrinsic_value = float(quality)
-        # Increased time_cost_exponent_factor to make cost of time more significant
-        time_cost_exponent_factor = 0.15 # << ADJUST THIS VALUE (e.g., 0.1, 0.15, 0.2)
-        time_cost = np.exp(time_elapsed * time_cost_exponent_factor) - 1
+        time_cost = np.exp(time_elapsed * self.time_cost_exponent_factor) - 1
         total_utility = intrinsic_value - time_cost
         return intrinsic_value, time_cost, total_utility
 
+    def calculate_utility_batch(self, qualities, times, time_cost_exponent_factors=None):
+        """Versión vectorizada de calculate_utility_components: los argumentos se difunden como arrays NumPy."""
+        if time_cost_exponent_factors is None:
+            time_cost_exponent_factors = self.time_cost_exponent_factor
+        intrinsic_values = np.asarray(qualities, dtype=np.float64)
+        time_costs = np.expm1(np.multiply(times, time_cost_exponent_factors, dtype=np.float64))
+        total_utilities = intrinsic_values - time_costs
+        return np.broadcast_arrays(intrinsic_values, time_costs, total_utilities)
+
+    def projected_utility(self, times, time_cost_exponent_factors=None):
+        """Utilidad neta esperada en cada instante de times según la curva de calidad ajustada."""
+        qualities = self.performance_predictor.predict_many(times)
+        return self.calculate_utility_batch(qualities, times, time_cost_exponent_factors)[2]
+
+    def optimal_stopping_time(self, time_cost_exponent_factors=None):
+        """Instante que maximiza la utilidad bajo la curva ajustada, resuelto sin simular (acepta arrays de factores)."""
+        if time_cost_exponent_factors is None:
+            time_cost_exponent_factors = self.time_cost_exponent_factor
+        return self.performance_predictor.optimal_stopping_time(time_cost_exponent_factors)
+
+    def plan_next_interval(self, elapsed_time):
+        """Intervalo hasta el próximo ciclo: la mitad del tiempo que falta para la parada prevista, acotada.
+
+        La parada prevista es medio monitoring_interval antes del óptimo, donde la prueba de
+        parada con horizonte monitoring_interval empieza a cumplirse; si cae antes de
+        minimum_run_time_before_stop, el próximo ciclo es justo después de ese mínimo.
+        """
+        if not self.adaptive_interval or not self.performance_predictor.ready:
+            return self.monitoring_interval
+        stop_time = float(self.optimal_stopping_time()) - self.monitoring_interval / 2
+        if stop_time != stop_time:  # NaN: no usable fit
+            return self.monitoring_interval
+        time_to_minimum = self.minimum_run_time_before_stop - elapsed_time
+        if stop_time <= self.minimum_run_time_before_stop and time_to_minimum >= 0:
+            # Stopping is due as soon as it is allowed: tick just after the minimum run time
+            return min(time_to_minimum + _AFTER_MINIMUM_RUN_TIME, self.max_monitoring_interval)
+        time_to_stop = stop_time - elapsed_time
+        # Halving the remaining time converges on the stop point without checking past it
+        return min(max(time_to_stop / 2, self.min_monitoring_interval), self.max_monitoring_interval)
+
+    def monitoring_stats(self):
+        """Cuánta monitorización costó la decisión de parada: ciclos, tiempo de CPU e intervalos usados."""
+        ticks = self.monitoring_ticks
+        return {
+            "ticks": ticks,
+            "cpu_time_s": self.monitoring_cpu_time,
+            "mean_interval_s": self._interval_sum / ticks if ticks else None,
+            "min_interval_s": self._interval_min if ticks else None,
+            "max_interval_s": self._interval_max if ticks else None,
+            "stop_time": self.plot_data["optimal_stop_time"],
+        }
+
+    def _projected_quality(self, quality, elapsed_time, horizon):
+        if self.performance_predictor.ready:
+            # Projected quality gain over the horizon from the fitted performance curve
+            return quality + self.performance_predictor.projected_gain(elapsed_time, horizon)
+        # Not enough history yet: assume a small constant improvement for next step
+        return quality + 0.5 # (Quality gain per monitoring_interval)
+
     def update_model_of_the_self(self):
-        self.model_of_the_self["performance_history_qualities"] = self.shared_memory.read("performance_history_qualities")
+        self.model_of_the_self["performance_history"] = self.shared_memory.history.snapshot()
+        new_samples, self._history_cursor = self.shared_memory.history.since(self._history_cursor)
+        for sample_time, sample_quality in new_samples:
+            self.performance_predictor.update(sample_time, sample_quality)
         self.model_of_the_self["current_quality"] = self.shared_memory.read("current_quality")
         if self.shared_memory.read("stop_signal"):
             self.object_level_running = False
 
-    def stop_reasoning(self):
-        print("MetaLevel: Starting stop_reasoning monitoring.")
-        monitoring_interval = 0.6
-        
-        # Small delay before stopping is allowed, to let curves develop
-        minimum_run_time_before_stop = 2.0 # seconds
+    def monitoring_tick(self):
+        """Un ciclo de monitorización; devuelve False cuando la supervisión debe terminar."""
+        tick_start = time.perf_counter()
+        self.monitoring_ticks += 1
+        self._tick_recorded = False
+        try:
+            keep_monitoring = self._monitoring_tick()
+        finally:
+            self.monitoring_cpu_time += time.perf_counter() - tick_start
+        # Listeners run once the tick's decision is made, outside the measured monitoring time
+        if self._tick_recorded:
+            for listener in self.tick_listeners:
+                listener(self.plot_data)
+        return keep_monitoring
+
+    def _monitoring_tick(self):
+        self.update_model_of_the_self()
+
+        current_quality_val = self.model_of_the_self.get("current_quality")
+        if current_quality_val is None:
+            if not self.shared_memory.read("object_level_running_flag"):
+                # The planner ended (or died) before publishing any quality: nothing left to monitor
+                self._log("MetaLevel: Object level stopped before publishing a plan.")
+                self.object_level_running = False
+            return self.object_level_running
+
+        current_quality = float(current_quality_val)
+        elapsed_time = self.clock.time() - self.start_time
+        monitoring_interval = self.next_interval = self.plan_next_interval(elapsed_time)
+        self._interval_sum += monitoring_interval
+        self._interval_min = min(self._interval_min, monitoring_interval)
+        self._interval_max = max(self._interval_max, monitoring_interval)
+
+        # The stop test asks "is waiting one nominal monitoring_interval worth it?" in both modes
+        horizon = self.monitoring_interval
+        intrinsic_now, cost_now, utility_now = self.calculate_utility_components(current_quality, elapsed_time)
+        _ , _ , utility_future = self.calculate_utility_components(
+            self._projected_quality(current_quality, elapsed_time, horizon), elapsed_time + horizon)
+        stop = utility_future <= utility_now
+        if not stop and self.adaptive_interval and self.performance_predictor.ready:
+            # If the test is projected to hold already at the next tick, stop now: an adaptive run then
+            # never stops later than the fixed-interval run, which stops at its first tick where it holds
+            next_time = elapsed_time + monitoring_interval
+            next_quality = self._projected_quality(current_quality, elapsed_time, monitoring_interval)
+            _, _, utility_next = self.calculate_utility_components(next_quality, next_time)
+            _, _, utility_after = self.calculate_utility_components(
+                self._projected_quality(next_quality, next_time, horizon), next_time + horizon)
+            stop = utility_after <= utility_next
+
+        self.plot_data.record(elapsed_time, current_quality, intrinsic_now, cost_now, utility_now)
+        self._tick_recorded = True
+
+        self._log(f"MetaLevel: Time: {elapsed_time:.2f}s, Q: {current_quality:.1f}, U_now: {utility_now:.2f}, U_future: {utility_future:.2f}, Cost: {cost_now:.2f}")
+
+        # Stop if projected utility is not better AND we've run for a minimum duration
+        if stop and elapsed_time > self.minimum_run_time_before_stop:
+            self._log(f"MetaLevel: Stop Reasoning. U_future ({utility_future:.2f}) <= U_now ({utility_now:.2f}) at t={elapsed_time:.2f}s.")
+            self.shared_memory.update("stop_signal_time", time.perf_counter())
+            self.shared_memory.update("stop_signal", True)
+            self.plot_data["optimal_stop_time"] = elapsed_time
+            self.plot_data["optimal_stop_utility"] = utility_now
+            self.plot_data["optimal_stop_quality"] = current_quality
+            self.object_level_running = False
+            return False
 
-        while self.object_level_running:
-            time.sleep(monitoring_interval)
-            self.update_model_of_the_self()
-
-            current_quality_val = self.model_of_the_self.get("current_quality")
-            if current_quality_val is None:
-                continue
-            
-            current_quality = float(current_quality_val)
-            elapsed_time = time.time() - self.start_time
-
-            # Simplified projection for MPVC: assume a small constant improvement for next step
-            projected_quality_next_step = current_quality + 0.5 # (Quality gain per monitoring_interval)
-
-            intrinsic_now, cost_now, utility_now = self.calculate_utility_components(current_quality, elapsed_time)
-            _ , _ , utility_future = self.calculate_utility_components(projected_quality_next_step, elapsed_time + monitoring_interval)
-
-            self.plot_data["times"].append(elapsed_time)
-            self.plot_data["qualities"].append(current_quality)
-            self.plot_data["intrinsic_values"].append(intrinsic_now)
-            self.plot_data["time_costs"].append(cost_now)
-            self.plot_data["total_utilities"].append(utility_now)
-            
-            print(f"MetaLevel: Time: {elapsed_time:.2f}s, Q: {current_quality:.1f}, U_now: {utility_now:.2f}, U_future: {utility_future:.2f}, Cost: {cost_now:.2f}")
-
-            # Stop if projected utility is not better AND we've run for a minimum duration
-            if utility_future <= utility_now and elapsed_time > minimum_run_time_before_stop:
-                print(f"MetaLevel: Stop Reasoning. U_future ({utility_future:.2f}) <= U_now ({utility_now:.2f}) at t={elapsed_time:.2f}s.")
-                self.shared_memory.update("stop_signal", True)
+        if not self.shared_memory.read("object_level_running_flag"):
+            self._log("MetaLevel: Object level seems to have stopped independently.")
+            self.object_level_running = False
+            if self.plot_data["optimal_stop_time"] is None and len(self.plot_data):
+                # This tick is the last one recorded (or dropped by decimation): use its values directly
                 self.plot_data["optimal_stop_time"] = elapsed_time
                 self.plot_data["optimal_stop_utility"] = utility_now
                 self.plot_data["optimal_stop_quality"] = current_quality
-                self.object_level_running = False
-                break
-            
-            if not self.shared_memory.read("object_level_running_flag"):
-                 print("MetaLevel: Object level seems to have stopped independently.")
-                 self.object_level_running = False
-                 if self.plot_data["optimal_stop_time"] is None and self.plot_data["times"]:
-                    self.plot_data["optimal_stop_time"] = self.plot_data["times"][-1]
-                    self.plot_data["optimal_stop_utility"] = self.plot_data["total_utilities"][-1]
-                    self.plot_data["optimal_stop_quality"] = self.plot_data["qualities"][-1]
-                 break
-
-        print("MetaLevel: Monitoring stopped.")
+            return False
+        return True
+
+    def finish_monitoring(self):
+        self._log("MetaLevel: Monitoring stopped.")
+        self.shared_memory.update("monitoring_stats", self.monitoring_stats())
         self.shared_memory.update("plot_data_final", self.plot_data)
+        for listener in self.tick_listeners:
+            listener(self.plot_data)
+
+    def stop_reasoning(self):
+        self._log("MetaLevel: Starting stop_reasoning monitoring.")
+        while self.object_level_running:
+            # Sleep until the next tick, or wake early if the object level finishes on its own
+            self.shared_memory.wait_for("object_level_running_flag", lambda running: not running, timeout=self.next_interval)
+            if not self.monitoring_tick():
+                break
+        self.finish_monitoring()
 
 
 class CARINA:
-    def __init__(self):
-        self.shared_memory = SharedMemory()
-        self.shared_memory.update("start_time", time.time())
+    def __init__(self, history_max_len=None, max_iterations=60, step_interval=0.5, monitoring_interval=0.6,
+                 minimum_run_time_before_stop=2.0, time_cost_exponent_factor=0.15, telemetry_max_points=None,
+                 clock=None, verbose=True, backend="thread", planner=None, adaptive_interval=False,
+                 min_monitoring_interval=None, max_monitoring_interval=None, planner_factory=None):
+        # A VirtualClock runs the session on the event scheduler instead of threads, faster than real time
+        self.clock = clock or RealClock()
+        if backend not in ("thread", "process"):
+            raise ValueError("backend must be 'thread' or 'process'.")
+        self.backend = backend
+        if planner is not None and planner_factory is not None:
+            raise ValueError("Pass either planner or planner_factory, not both.")
+        if planner_factory is not None:
+            # A callable building a fresh planner, so options shared by many sessions never share one
+            planner = planner_factory()
+        if backend == "process":
+            if self.clock.virtual:
+                raise ValueError("The process backend needs a real clock.")
+            # The planner runs in a child process: the history must fit a fixed shared block
+            self.shared_memory = ProcessSharedMemory(history_max_len=history_max_len or max_iterations,
+                                                     context=_process_context())
+        else:
+            # history_max_len bounds the performance history for long-running sessions
+            self.shared_memory = SharedMemory(history_max_len=history_max_len)
+        self.shared_memory.update("start_time", self.clock.time())
         self.shared_memory.update("stop_signal", False)
-        self.shared_memory.update("performance_history_qualities", [])
         self.shared_memory.update("object_level_running_flag", True)
-
-        self.object_level = ObjectLevel(self.shared_memory)
-        self.meta_level = MetaLevel(self.shared_memory)
+        self.verbose = verbose
+        self._resumed_from = None  # Checkpoint path this session was restored from
+        # Saved in checkpoints, so CARINA.resume(path) continues with the same cadence, cost model and limits
+        self.options = {"history_max_len": history_max_len, "max_iterations": max_iterations,
+                        "step_interval": step_interval, "monitoring_interval": monitoring_interval,
+                        "minimum_run_time_before_stop": minimum_run_time_before_stop,
+                        "time_cost_exponent_factor": time_cost_exponent_factor,
+                        "telemetry_max_points": telemetry_max_points, "adaptive_interval": adaptive_interval,
+                        "min_monitoring_interval": min_monitoring_interval,
+                        "max_monitoring_interval": max_monitoring_interval}
+
+        self.object_level = ObjectLevel(self.shared_memory, max_iterations, step_interval, self.clock, verbose, planner)
+        self.meta_level = MetaLevel(self.shared_memory, monitoring_interval, minimum_run_time_before_stop,
+                                    time_cost_exponent_factor, telemetry_max_points=telemetry_max_points,
+                                    clock=self.clock, verbose=verbose, adaptive_interval=adaptive_interval,
+                                    min_monitoring_interval=min_monitoring_interval,
+                                    max_monitoring_interval=max_monitoring_interval)
+
+    def _log(self, message):
+        if self.verbose:
+            print(message)
+
+    def close(self):
+        """Libera el bloque de memoria compartida del backend "process"; los resultados siguen legibles."""
+        if self.backend == "process" and not self.shared_memory.closed:
+            self.shared_memory.close()
+            # The cached snapshot pointed into the unmapped block: refresh it from the local copy
+            self.meta_level.model_of_the_self["performance_history"] = self.shared_memory.history.snapshot()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    @classmethod
+    def resume(cls, path, **options):
+        """Restaura la sesión del checkpoint en path; execute(goal) la continúa.
+
+        La configuración guardada (intervalos, modelo de coste, límites y planificador) es la
+        de la sesión restaurada; options solo añade opciones de ejecución (clock, verbose,
+        backend) y las guardadas que se repitan deben coincidir.
+        """
+        checkpoint = read_checkpoint(path)
+        session = cls(**resume_options(checkpoint["config"], options))
+        try:
+            check_planner(session.object_level.planner, checkpoint["config"])
+            restore_session(session, checkpoint)
+        except BaseException:
+            session.close()
+            raise
+        session._resumed_from = Path(path).resolve()
+        return session
+
+    def checkpoint_to(self, path, every=1):
+        """Guarda checkpoints incrementales en path cada `every` ciclos de monitorización.
+
+        Solo se añade a un archivo existente si la sesión se restauró de él; si no, se
+        sobrescribe. No disponible con el backend "process".
+        """
+        resume = self._resumed_from is not None and Path(path).resolve() == self._resumed_from
+        return SessionCheckpointer(self, path, resume=resume).attach(every)
 
     def execute(self, goal):
-        print(f"CARINA: Executing goal '{goal}'")
+        if self.clock.virtual:
+            # Simulated time cannot drive blocking threads: step both levels on the event scheduler
+            return CARINAScheduler(clock=self.clock).run([self], [goal])[0]
+
+        self._log(f"CARINA: Executing goal '{goal}'")
         self.shared_memory.update("goal", goal)
+        if self.backend == "process":
+            return self._execute_in_process(goal)
 
         planning_thread = threading.Thread(target=self.object_level.anytime_planning, args=(goal,))
         monitoring_thread = threading.Thread(target=self.meta_level.stop_reasoning)
@@ -163,91 +502,188 @@ class CARINA:
         monitoring_thread.start()
 
         planning_thread.join()
-        print("CARINA: Planning thread joined.")
+        self._log("CARINA: Planning thread joined.")
         self.shared_memory.update("object_level_running_flag", False)
 
         monitoring_thread.join()
-        print("CARINA: Monitoring thread joined.")
+        self._log("CARINA: Monitoring thread joined.")
+        return self.collect_results()
+
+    def _execute_in_process(self, goal):
+        """Planifica en un proceso hijo (sin compartir el GIL) y monitoriza desde este proceso."""
+        context = _process_context()
+        results = context.Queue()
+        planner = context.Process(target=_plan_in_process, args=(self.object_level, goal, results), daemon=True)
+        try:
+            planner.start()
+            # If the child dies without clearing the running flag (e.g. killed), clear it for it
+            threading.Thread(target=_clear_flag_on_exit, args=(planner, self.shared_memory), daemon=True).start()
+            self.meta_level.stop_reasoning()
+            # final_plan is not a numeric key, so it comes back through the queue
+            self.shared_memory.update("final_plan", _receive_plan(results, planner))
+            planner.join()
+            self._log("CARINA: Planning process joined.")
+        finally:
+            if planner.is_alive():
+                planner.terminate()
+                planner.join()
+            self.close()
+        return self.collect_results()
+
+    def collect_results(self):
+        """Reúne el plan final, los datos de utilidad y la latencia de parada de una ejecución terminada."""
+        stop_signal_time = self.shared_memory.read("stop_signal_time")
+        halt_time = self.shared_memory.read("halt_time")
+        if stop_signal_time is not None and halt_time is not None:
+            # Stop-to-halt latency: time between the MetaLevel decision and the planner leaving its loop
+            stop_latency = halt_time - stop_signal_time
+            self.shared_memory.update("stop_latency", stop_latency)
+            self._log(f"CARINA: Stop-to-halt latency: {stop_latency * 1000:.3f} ms")
 
         final_plan = self.shared_memory.read("final_plan")
         plot_data = self.shared_memory.read("plot_data_final")
         return final_plan, plot_data
 
-def plot_utility_vs_time(plot_data):
-    if not plot_data or not plot_data["times"]:
-        print("No data to plot.")
-        return
-
-    times = np.array(plot_data["times"])
-    # Ensure all plot data arrays are of the same length before plotting
-    min_len = len(times)
-    intrinsic_values = np.array(plot_data["intrinsic_values"][:min_len])
-    time_costs = np.array(plot_data["time_costs"][:min_len])
-    total_utilities = np.array(plot_data["total_utilities"][:min_len])
-
-
-    plt.figure(figsize=(10, 7)) # Slightly taller for better annotation space
-
-    plt.plot(times, intrinsic_values, label='Intrinsic Value Function (Quality)', color='green', linestyle='-', linewidth=2)
-    plt.plot(times, time_costs, label='Cost of Time (Magnitude)', color='red', linestyle=':', linewidth=2)
-    plt.plot(times, total_utilities, label='Time-Dependent Utility (Net)', color='blue', linewidth=2.5)
-
-    optimal_time = plot_data.get("optimal_stop_time")
-    optimal_utility = plot_data.get("optimal_stop_utility")
-
-    if optimal_time is not None and optimal_utility is not None:
-        plt.scatter([optimal_time], [optimal_utility], color='black', s=120, zorder=5, label='Optimal Stopping Point', marker='X')
-        plt.vlines(optimal_time, min(0, np.min(total_utilities) if total_utilities.size > 0 else 0), optimal_utility, colors='dimgray', linestyles='dashdot', zorder=0)
-        plt.hlines(optimal_utility, 0, optimal_time, colors='dimgray', linestyles='dashdot', zorder=0)
-        
-        optimal_quality_at_stop = plot_data.get("optimal_stop_quality", "N/A")
-        annotation_text = (f"Stop Point\n"
-                           f"Time: {optimal_time:.2f}s\n"
-                           f"Net Utility: {optimal_utility:.2f}\n"
-                           f"Quality: {optimal_quality_at_stop:.1f}")
-        
-        # Adjust annotation position dynamically
-        text_x_offset = (times.max() - times.min()) * 0.05 # 5% of x-range
-        text_y_offset = (max(np.max(intrinsic_values), np.max(total_utilities)) - min(0, np.min(total_utilities))) * 0.05 # 5% of y-range
-        
-        # Heuristic for placing annotation to avoid overlap
-        if optimal_time > times.mean(): # If stopping point is in the right half
-            annot_x = optimal_time - text_x_offset
-            ha = 'right'
-        else: # If stopping point is in the left half
-            annot_x = optimal_time + text_x_offset
-            ha = 'left'
-
-        if optimal_utility > total_utilities.mean(): # If stopping point is in the upper half
-             annot_y = optimal_utility - text_y_offset
-             va = 'top'
-        else:
-             annot_y = optimal_utility + text_y_offset
-             va = 'bottom'
-
-
-        plt.annotate(annotation_text,
-                     xy=(optimal_time, optimal_utility),
-                     xytext=(annot_x, annot_y),
-                     arrowprops=dict(facecolor='black', shrink=0.05, width=1, headwidth=6),
-                     bbox=dict(boxstyle="round,pad=0.5", fc="ivory", ec="gray", alpha=0.9),
-                     fontsize=9,
-                     ha=ha, va=va)
-
-    plt.xlabel('Time (seconds)')
-    plt.ylabel('Utility')
-    plt.title('Meta-Level Control: Utility Dynamics Over Time', fontsize=14)
-    plt.legend(loc='best')
-    plt.grid(True, linestyle='--', alpha=0.6)
-    
-    # Adjust y-limits to ensure visibility of curves, especially if utility goes negative
-    y_min_plot = min(0, np.min(total_utilities) if total_utilities.size > 0 else 0, np.min(time_costs) if time_costs.size > 0 else 0)
-    y_max_plot = max(np.max(intrinsic_values) if intrinsic_values.size > 0 else 1, np.max(total_utilities) if total_utilities.size > 0 else 1)
-    plt.ylim(y_min_plot - abs(y_min_plot*0.1) - 1, y_max_plot + abs(y_max_plot*0.1) +1) # Add some padding
-    
-    plt.axhline(0, color='black', linewidth=0.5, linestyle='-') # X-axis line
-    plt.tight_layout()
-    plt.show()
+
+def _fresh_planner(options):
+    # planner.start(goal) resets the search, so one instance cannot serve several sessions
+    if options.get("planner") is None:
+        return options
+    return {**options, "planner": copy.deepcopy(options["planner"])}
+
+
+def _process_context():
+    # fork lets the child inherit CARINA objects even when this file was loaded through carina_loader
+    if "fork" in multiprocessing.get_all_start_methods():
+        return multiprocessing.get_context("fork")
+    return multiprocessing.get_context()
+
+
+def _plan_in_process(object_level, goal, results):
+    try:
+        object_level.anytime_planning(goal)
+    finally:
+        # Answer the parent even if the planner raised
+        results.put(object_level.current_plan)
+        object_level.shared_memory.update("object_level_running_flag", False)
+
+
+def _clear_flag_on_exit(process, shared_memory):
+    multiprocessing.connection.wait([process.sentinel])
+    # A child killed inside wait_for would block every later notify
+    shared_memory.drop_waiters()
+    shared_memory.update("object_level_running_flag", False)
+
+
+def _receive_plan(results, process, poll_interval=0.1):
+    """Plan enviado por el proceso hijo, o None si terminó sin enviarlo."""
+    while True:
+        try:
+            return results.get(timeout=poll_interval)
+        except queue.Empty:
+            if not process.is_alive():
+                # Whatever it sent before exiting is already in the pipe
+                try:
+                    return results.get(timeout=poll_interval)
+                except queue.Empty:
+                    return None
+
+
+class CARINAScheduler:
+    """Multiplexa muchas sesiones CARINA (ObjectLevel + MetaLevel) sobre un temporizador central.
+
+    En lugar de dos hilos por objetivo, cada paso de planificación y cada ciclo de
+    monitorización es un evento en una cola de prioridad ordenada por vencimiento. Los
+    eventos que vencen juntos se despachan en línea o, con workers, en un pool fijo de hilos.
+    """
+    PLANNING = 0
+    MONITORING = 1
+
+    def __init__(self, workers=None, clock=None, verbose=False, **session_options):
+        self.workers = workers
+        self.clock = clock or RealClock()  # Shared by every session; a VirtualClock makes the run instantaneous
+        self.verbose = verbose
+        self.session_options = session_options  # Passed through to every CARINA session
+
+    def execute_many(self, goals):
+        """Ejecuta un objetivo por sesión y devuelve [(final_plan, plot_data), ...] en el orden de goals.
+
+        Cada sesión necesita su propio planificador: pasa planner_factory en session_options,
+        o un planner que se copia para cada sesión.
+        """
+        goals = list(goals)
+        sessions = [CARINA(clock=self.clock, verbose=self.verbose, **_fresh_planner(self.session_options))
+                    for _ in goals]
+        return self.run(sessions, goals)
+
+    def run(self, sessions, goals):
+        """Conduce sesiones ya construidas hasta que todas terminan."""
+        clock = self.clock
+        now = clock.time()
+        timers = []
+        sequence = itertools.count()  # Tie-breaker: same-time events keep their scheduling order
+        tokens = {}  # Latest token per (session, kind); superseded timers are dropped when popped
+
+        def schedule(index, kind, due):
+            token = next(sequence)
+            tokens[(index, kind)] = token
+            heapq.heappush(timers, (due, token, index, kind))
+
+        for index, (session, goal) in enumerate(zip(sessions, goals)):
+            session._log(f"CARINA: Executing goal '{goal}'")
+            session.shared_memory.update("goal", goal)
+            schedule(index, self.PLANNING, now + session.object_level.first_step_delay)
+            if session.meta_level.object_level_running:
+                schedule(index, self.MONITORING, now + session.meta_level.next_interval)
+            else:
+                # A session resumed after its stop decision has nothing left to monitor
+                session.meta_level.finish_monitoring()
+
+        pool = ThreadPoolExecutor(self.workers) if self.workers else None
+        try:
+            while timers:
+                clock.sleep(timers[0][0] - clock.time())
+                now = clock.time()
+                batch = []
+                while timers and timers[0][0] <= now:
+                    _, token, index, kind = heapq.heappop(timers)
+                    if tokens.get((index, kind)) == token:
+                        batch.append((index, kind))
+                if pool is not None:
+                    outcomes = list(pool.map(lambda event: self._fire(sessions[event[0]], goals[event[0]], event[1]), batch))
+                else:
+                    outcomes = [self._fire(sessions[index], goals[index], kind) for index, kind in batch]
+                now = clock.time()
+                for (index, kind), wakeups in zip(batch, outcomes):
+                    if kind not in wakeups:
+                        tokens.pop((index, kind), None)
+                    for wake_kind, delay in wakeups.items():
+                        schedule(index, wake_kind, now + delay)
+        finally:
+            if pool is not None:
+                pool.shutdown()
+        return [session.collect_results() for session in sessions]
+
+    def _fire(self, session, goal, kind):
+        """Ejecuta un evento y devuelve {tipo: retardo} con los eventos a (re)programar de la sesión."""
+        object_level = session.object_level
+        meta_level = session.meta_level
+        if kind == self.PLANNING:
+            if not object_level.can_continue():
+                object_level.finish_planning()
+                session.shared_memory.update("object_level_running_flag", False)
+                # Wake the monitor right away, as the threaded loop does on the running flag
+                return {self.MONITORING: 0.0} if meta_level.object_level_running else {}
+            object_level.planning_step(goal)
+            return {self.PLANNING: object_level.step_interval}
+
+        if meta_level.monitoring_tick():
+            return {self.MONITORING: meta_level.next_interval}
+        meta_level.finish_monitoring()
+        if object_level.running and session.shared_memory.read("stop_signal"):
+            # Wake the planner right away so it halts on the stop signal
+            return {self.PLANNING: 0.0}
+        return {}
 
 if __name__ == "__main__":
     tutor_mind = CARINA()
@@ -262,7 +698,8 @@ if __name__ == "__main__":
     else:
         print("No final plan generated.")
 
-    if collected_plot_data and collected_plot_data["times"]:
+    if collected_plot_data and len(collected_plot_data["times"]):
+        from plotting import plot_utility_vs_time # Imported here so library users never load matplotlib
         plot_utility_vs_time(collected_plot_data)
     else:
         print("No plot data collected or data is empty.")
\ No newline at end of file
@@ -0,0 +1,420 @@
+"""Benchmarks de CARINA: sobrecarga del control metanivel y latencia de las decisiones de parada.
+
+Uso:
+    python bench_carina.py                      # todos los benchmarks, JSON por stdout
+    python bench_carina.py --output bench.json  # guarda el JSON para comparar builds
+    python bench_carina.py --only shared_memory_ops stop_latency
+"""
+import argparse
+import json
+import platform
+import random
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+from pathlib import Path
+
+import numpy as np
+
+from carina_clock import VirtualClock
+from checkpoint import SessionCheckpointer, read_checkpoint
+from carina_loader import load_carina
+from planners import AnytimeWeightedAStarPlanner, CurriculumGraph
+
+sys.path.insert(0, str(Path(__file__).with_name("cognitive-functions")))
+from catalogo import CatalogoActividades  # noqa: E402
+from planning import ESTRATEGIAS_POR_ESTILO, ESTRATEGIAS_POR_PROBLEMA, PRGenerator  # noqa: E402
+
+carina = load_carina()
+
+# Short intervals and a steep time cost so real-time runs reach a stop decision in a fraction of a second
+FAST_SESSION = dict(step_interval=0.01, monitoring_interval=0.012, minimum_run_time_before_stop=0.05,
+                    time_cost_exponent_factor=10.0, max_iterations=200, verbose=False)
+
+
+def _summary(samples):
+    """Estadísticos de una lista de muestras (en las unidades de entrada)."""
+    samples = np.asarray(samples, dtype=np.float64)
+    if samples.size == 0:
+        return {"count": 0}
+    return {
+        "count": int(samples.size),
+        "mean": float(samples.mean()),
+        "p50": float(np.percentile(samples, 50)),
+        "p95": float(np.percentile(samples, 95)),
+        "max": float(samples.max()),
+    }
+
+
+def _ns_per_call(function, calls):
+    start = time.perf_counter_ns()
+    for _ in range(calls):
+        function()
+    return (time.perf_counter_ns() - start) / calls
+
+
+def _new_session(**options):
+    return carina.CARINA(**{**FAST_SESSION, **options})
+
+
+def bench_shared_memory_ops(calls=200_000):
+    """Coste por operación de SharedMemory (update/read, CAS y lotes de un paso de planificación) sin contención."""
+    shared_memory = carina.SharedMemory()
+    shared_memory.update("current_quality", 1.0)
+    step_values = {"current_quality": 1.0, "current_plan_length": 1}
+
+    def compare_and_swap():
+        _, version = shared_memory.read_versioned("current_quality")
+        shared_memory.compare_and_swap("current_quality", version, 1.0)
+
+    return {
+        "update_ns": _ns_per_call(lambda: shared_memory.update("current_quality", 1.0), calls),
+        "read_ns": _ns_per_call(lambda: shared_memory.read("current_quality"), calls),
+        "read_versioned_cas_ns": _ns_per_call(compare_and_swap, calls),
+        "update_many_step_ns": _ns_per_call(lambda: shared_memory.update_many(step_values), calls),
+        "read_many_step_ns": _ns_per_call(lambda: shared_memory.read_many(step_values), calls),
+    }
+
+
+def bench_lock_contention(ops_per_thread=50_000, thread_counts=(1, 2, 4, 8)):
+    """Rendimiento agregado de SharedMemory con varios hilos mezclando escrituras y lecturas."""
+    results = {}
+    for n_threads in thread_counts:
+        shared_memory = carina.SharedMemory()
+        barrier = threading.Barrier(n_threads + 1)
+
+        def worker(index):
+            key = f"key_{index % 3}"
+            barrier.wait()
+            for i in range(ops_per_thread):
+                if i % 3 == 0:
+                    shared_memory.update(key, i)
+                else:
+                    shared_memory.read(key)
+
+        threads = [threading.Thread(target=worker, args=(i,)) for i in range(n_threads)]
+        for thread in threads:
+            thread.start()
+        barrier.wait()
+        start = time.perf_counter()
+        for thread in threads:
+            thread.join()
+        elapsed = time.perf_counter() - start
+        total_ops = n_threads * ops_per_thread
+        results[str(n_threads)] = {"ops_per_sec": total_ops / elapsed, "ns_per_op": elapsed * 1e9 / total_ops}
+    return results
+
+
+def bench_step_overhead(steps=2000, runs=200):
+    """Sobrecarga por paso de planificación, por ciclo de monitorización y por ejecución simulada completa."""
+    session = _new_session(clock=VirtualClock(), max_iterations=steps)
+    object_level = session.object_level
+    planning_ns = _ns_per_call(lambda: object_level.planning_step("bench"), steps)
+
+    meta_level = session.meta_level
+    meta_level.minimum_run_time_before_stop = float("inf")  # Keep ticking, never stop
+    monitoring_ns = _ns_per_call(meta_level.monitoring_tick, steps)
+
+    durations = []
+    total_steps = 0
+    for _ in range(runs):
+        session = carina.CARINA(clock=VirtualClock(), verbose=False)
+        start = time.perf_counter_ns()
+        final_plan, _ = session.execute("bench")
+        durations.append(time.perf_counter_ns() - start)
+        total_steps += len(final_plan)
+    return {
+        "planning_step_ns": planning_ns,
+        "monitoring_tick_ns": monitoring_ns,
+        "simulated_execute_us": _summary(np.array(durations) / 1e3),
+        "simulated_execute_ns_per_step": sum(durations) / max(total_steps, 1),
+    }
+
+
+def _random_curriculum(activities=14, seed=0):
+    rng = random.Random(seed)
+    names = [f"activity {i}" for i in range(activities)]
+    prerequisites = {names[i]: [names[j] for j in range(i) if rng.random() < 0.15] for i in range(activities)}
+    return CurriculumGraph.from_activities(names, [rng.uniform(0, 4) for _ in names], prerequisites)
+
+
+def bench_anytime_planner(expansions_per_step=64, step_time_budget=0.001):
+    """Duración de cada step() del A* ponderado anytime y pasos hasta el primer plan y hasta demostrar el óptimo."""
+    planner = AnytimeWeightedAStarPlanner(_random_curriculum(), expansions_per_step=expansions_per_step)
+    planner.start("bench")
+    step_us = []
+    first_plan_step = None
+    improving = True
+    while improving:
+        start = time.perf_counter_ns()
+        improving = planner.step()
+        step_us.append((time.perf_counter_ns() - start) / 1e3)
+        if first_plan_step is None and planner.quality() > 0:
+            first_plan_step = len(step_us)
+
+    budgeted = AnytimeWeightedAStarPlanner(_random_curriculum(), expansions_per_step=10**9,
+                                           step_time_budget=step_time_budget)
+    budgeted.start("bench")
+    budget_us = []
+    for _ in range(20):
+        start = time.perf_counter_ns()
+        budgeted.step()
+        budget_us.append((time.perf_counter_ns() - start) / 1e3)
+    return {
+        "step_us": _summary(step_us),
+        "steps_to_first_plan": first_plan_step,
+        "steps_to_optimal": len(step_us),
+        "expansions": planner.expansions,
+        "budgeted_step_us": {"budget_us": step_time_budget * 1e6, **_summary(budget_us)},
+    }
+
+
+def bench_adaptive_monitoring(cost_factors=(0.05, 0.1, 0.15, 0.2, 0.3, 0.6), step_intervals=(0.5, 0.1, 0.05)):
+    """Ciclos de monitorización por decisión de parada con intervalo fijo y adaptativo, y distancia al óptimo.
+
+    Cada configuración se ejecuta en los dos modos; later_than_fixed cuenta las configuraciones
+    en que el modo adaptativo paró después que el fijo (debe ser 0).
+    """
+    results = {}
+    stop_times = {}
+    for adaptive in (False, True):
+        ticks = []
+        stop_delay = []
+        stops = stop_times[adaptive] = []
+        for factor in cost_factors:
+            for step_interval in step_intervals:
+                session = carina.CARINA(clock=VirtualClock(), verbose=False, adaptive_interval=adaptive,
+                                        time_cost_exponent_factor=factor, step_interval=step_interval,
+                                        max_iterations=10_000)
+                _, plot_data = session.execute("bench")
+                ticks.append(session.meta_level.monitoring_ticks)
+                stops.append(plot_data["optimal_stop_time"])
+                # Stop time minus the optimum of the final fitted curve (negative: stopped early)
+                stop_delay.append(plot_data["optimal_stop_time"] - float(session.meta_level.optimal_stopping_time()))
+        results["adaptive" if adaptive else "fixed"] = {"ticks_per_stop": _summary(ticks),
+                                                        "stop_minus_optimum_s": _summary(stop_delay)}
+    adaptive_minus_fixed = np.subtract(stop_times[True], stop_times[False])
+    results["adaptive_minus_fixed_stop_s"] = _summary(adaptive_minus_fixed)
+    results["later_than_fixed"] = int(np.count_nonzero(adaptive_minus_fixed > 1e-5))
+    return results
+
+
+def bench_checkpoint(ticks=2000):
+    """Tamaño y coste de los checkpoints incrementales escritos en cada ciclo, y tiempo de restauración."""
+    session = _new_session(clock=VirtualClock(), max_iterations=ticks, time_cost_exponent_factor=0.0)
+    meta_level = session.meta_level
+    meta_level.minimum_run_time_before_stop = float("inf")
+    with tempfile.TemporaryDirectory() as directory:
+        path = Path(directory) / "session.ckpt"
+        write_us = []
+        with SessionCheckpointer(session, path) as checkpointer:
+            for _ in range(ticks):
+                session.object_level.planning_step("bench")
+                session.clock.sleep(meta_level.monitoring_interval)
+                meta_level.monitoring_tick()
+                start = time.perf_counter_ns()
+                checkpointer.write()
+                write_us.append((time.perf_counter_ns() - start) / 1e3)
+        size = path.stat().st_size
+        start = time.perf_counter()
+        carina.CARINA.resume(path, clock=VirtualClock(), verbose=False, max_iterations=ticks)
+        restore_ms = (time.perf_counter() - start) * 1e3
+        read_ms = _ns_per_call(lambda: read_checkpoint(path), 5) / 1e6
+    return {"ticks": ticks, "file_bytes": size, "bytes_per_checkpoint": size / ticks, "write_us": _summary(write_us),
+            "read_ms": read_ms, "restore_ms": restore_ms}
+
+
+def bench_monitoring_jitter(runs=3):
+    """Desviación real del instante de cada ciclo de monitorización respecto a su intervalo."""
+    deviations_ms = []
+    for _ in range(runs):
+        session = _new_session(time_cost_exponent_factor=0.0, max_iterations=60)
+        meta_level = session.meta_level
+        tick_times = []
+        original_tick = meta_level.monitoring_tick
+
+        def timed_tick():
+            tick_times.append(time.perf_counter())
+            return original_tick()
+
+        meta_level.monitoring_tick = timed_tick
+        session.execute("bench")
+        intervals = np.diff(tick_times)
+        # The last tick is woken early by the planner finishing, so it is not a scheduling deviation
+        deviations_ms.extend((intervals[:-1] - meta_level.monitoring_interval) * 1e3)
+    return {"interval_s": FAST_SESSION["monitoring_interval"], "deviation_ms": _summary(deviations_ms)}
+
+
+def bench_stop_latency(runs=20, backends=("thread", "process")):
+    """Tiempo desde que el MetaLevel emite stop_signal hasta que el planificador abandona su bucle."""
+    results = {}
+    for backend in backends:
+        latencies_ms = []
+        for _ in range(runs):
+            session = _new_session(backend=backend)
+            session.execute("bench")
+            latency = session.shared_memory.read("stop_latency")
+            if latency is not None:
+                latencies_ms.append(latency * 1e3)
+        results[backend] = {"runs": runs, "stopped_runs": len(latencies_ms), "latency_ms": _summary(latencies_ms)}
+    return results
+
+
+def bench_plot_data_memory(ticks=20_000):
+    """Memoria retenida por MetaLevel.plot_data en función del número de ciclos."""
+    # No time cost: thousands of simulated seconds would overflow the exponential
+    session = _new_session(clock=VirtualClock(), max_iterations=ticks, time_cost_exponent_factor=0.0)
+    session.object_level.planning_step("bench")
+    meta_level = session.meta_level
+    meta_level.minimum_run_time_before_stop = float("inf")
+    tracemalloc.start()
+    baseline, _ = tracemalloc.get_traced_memory()
+    for _ in range(ticks):
+        session.clock.sleep(meta_level.monitoring_interval)
+        meta_level.monitoring_tick()
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {"ticks": ticks, "retained_bytes": current - baseline, "bytes_per_tick": (current - baseline) / ticks,
+            "peak_bytes": peak - baseline}
+
+
+def bench_prgenerator(calls=20_000):
+    """Coste de PRGenerator.generar_plan para un perfil típico."""
+    generator = PRGenerator(
+        nivel_usuario="intermedio",
+        estilo_aprendizaje="visual",
+        problemas_detectados=["ansiedad matemática", "dificultad en razonamiento abstracto"],
+        objetivos=["Mejorar la confianza al resolver ecuaciones", "Aplicar álgebra a situaciones reales"],
+        duracion_semanas=4,
+    )
+    return {"generar_plan_ns": _ns_per_call(generator.generar_plan, calls)}
+
+
+# Each snippet runs in a fresh interpreter; it prints whether NumPy ended up loaded
+_STARTUP_SNIPPETS = {
+    "interpreter": "import sys",
+    "carina_o5": "import sys, CARINA",
+    "carina_o5_session_objects": "import sys, CARINA; CARINA.CARINA()",
+    "carina_o2": "import sys, carina_loader; carina_loader.load_carina()",
+}
+
+
+def bench_startup(runs=10):
+    """Arranque en frío de un proceso que importa CARINA (lo que paga cada worker nuevo)."""
+    root = Path(__file__).resolve().parent
+    results = {}
+    for name, snippet in _STARTUP_SNIPPETS.items():
+        code = f"{snippet}; print('numpy' in sys.modules)"
+        samples_ms = []
+        for _ in range(runs):
+            start = time.perf_counter()
+            output = subprocess.run([sys.executable, "-c", code], cwd=root, check=True, capture_output=True,
+                                    text=True, timeout=60).stdout
+            samples_ms.append((time.perf_counter() - start) * 1e3)
+        results[name] = {"process_ms": _summary(samples_ms), "numpy_loaded": output.strip() == "True"}
+    return results
+
+
+def _catalogo_sintetico(actividades=5000, seed=0):
+    rng = random.Random(seed)
+    estilos = list(ESTRATEGIAS_POR_ESTILO)
+    problemas = list(ESTRATEGIAS_POR_PROBLEMA)
+    temas = ["ecuaciones", "funciones", "gráficas", "presupuesto", "confianza", "ansiedad", "sistemas", "variables",
+             "restricciones", "acertijos", "simulación", "proyectos"]
+    registros = []
+    for i in range(actividades):
+        registros.append({
+            "id": f"act-{i}",
+            "descripcion": f"Actividad {i}: {rng.choice(temas)} y {rng.choice(temas)}",
+            "dificultad": rng.uniform(1, 3),
+            "estilos": rng.sample(estilos, rng.randint(1, 2)),
+            "problemas": rng.sample(problemas, rng.randint(0, 1)),
+            "objetivos": [" ".join(rng.sample(temas, 2))],
+            # Prerequisites only point backwards, so the catalog is acyclic
+            "prerrequisitos": [f"act-{j}" for j in rng.sample(range(i), min(i, rng.randint(0, 2)))],
+        })
+    return registros
+
+
+def bench_catalogo(actividades=5000, perfiles=2000, semanas=12):
+    """Construcción de los índices del catálogo y selección de actividades por perfil (en frío y con caché)."""
+    registros = _catalogo_sintetico(actividades)
+    start = time.perf_counter()
+    catalogo = CatalogoActividades.desde_registros(registros)
+    build_ms = (time.perf_counter() - start) * 1e3
+
+    rng = random.Random(1)
+    estilos = list(ESTRATEGIAS_POR_ESTILO)
+    problemas = list(ESTRATEGIAS_POR_PROBLEMA)
+    objetivos = ["Mejorar la confianza al resolver ecuaciones", "Aplicar funciones a proyectos reales",
+                 "Reducir la ansiedad ante sistemas de variables"]
+    consultas = [(rng.choice(estilos), rng.sample(problemas, rng.randint(0, 2)), rng.sample(objetivos, 2),
+                  rng.choice(["básico", "intermedio", "avanzado"])) for _ in range(perfiles)]
+    cold_us = []
+    warm_us = []
+    for estilo, problemas_perfil, objetivos_perfil, nivel in consultas:
+        misses = catalogo.cache.fallos
+        start = time.perf_counter_ns()
+        catalogo.seleccionar(semanas, estilo, problemas_perfil, objetivos_perfil, nivel)
+        elapsed = (time.perf_counter_ns() - start) / 1e3
+        # The first query of a profile signature ranks the candidates; later ones reuse the ranking
+        (cold_us if catalogo.cache.fallos > misses else warm_us).append(elapsed)
+    return {"activities": actividades, "weeks": semanas, "build_ms": build_ms, "cold_select_us": _summary(cold_us),
+            "warm_select_us": _summary(warm_us), "cache": catalogo.cache.estadisticas()}
+
+
+BENCHMARKS = {
+    "shared_memory_ops": bench_shared_memory_ops,
+    "lock_contention": bench_lock_contention,
+    "step_overhead": bench_step_overhead,
+    "anytime_planner": bench_anytime_planner,
+    "adaptive_monitoring": bench_adaptive_monitoring,
+    "monitoring_jitter": bench_monitoring_jitter,
+    "stop_latency": bench_stop_latency,
+    "plot_data_memory": bench_plot_data_memory,
+    "checkpoint": bench_checkpoint,
+    "prgenerator": bench_prgenerator,
+    "catalogo": bench_catalogo,
+    "startup": bench_startup,
+}
+
+
+def run_benchmarks(names=None):
+    """Ejecuta los benchmarks pedidos (todos por defecto) y devuelve un dict serializable a JSON."""
+    names = names or list(BENCHMARKS)
+    report = {
+        "metadata": {
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+            "python": sys.version.split()[0],
+            "numpy": np.__version__,
+            "platform": platform.platform(),
+        },
+        "results": {},
+    }
+    for name in names:
+        start = time.perf_counter()
+        result = BENCHMARKS[name]()
+        result["wall_time_s"] = time.perf_counter() - start
+        report["results"][name] = result
+    return report
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmarks de control metanivel de CARINA.")
+    parser.add_argument("--only", nargs="+", choices=sorted(BENCHMARKS), help="Ejecuta solo estos benchmarks.")
+    parser.add_argument("--output", help="Ruta del JSON de resultados (por defecto, stdout).")
+    args = parser.parse_args(argv)
+
+    report = run_benchmarks(args.only)
+    text = json.dumps(report, indent=2)
+    if args.output:
+        Path(args.output).write_text(text + "\n", encoding="utf-8")
+    else:
+        print(text)
+
+
+if __name__ == "__main__":
+    main()
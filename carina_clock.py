@@ -0,0 +1,38 @@
+import time
+
+
+class RealClock:
+    """Reloj de pared: el tiempo avanza solo y sleep bloquea el hilo."""
+    virtual = False
+
+    def time(self):
+        return time.time()
+
+    def sleep(self, seconds):
+        if seconds > 0:
+            time.sleep(seconds)
+
+
+class VirtualClock:
+    """Reloj simulado y determinista: el tiempo solo avanza cuando alguien duerme, y lo hace al instante.
+
+    Con este reloj CARINA ejecuta las sesiones sobre el planificador de eventos en lugar de
+    hilos, de modo que la misma lógica de control metanivel produce las mismas decisiones
+    de parada en microsegundos.
+    """
+    virtual = True
+
+    def __init__(self, start=0.0):
+        self.now = float(start)
+
+    def time(self):
+        return self.now
+
+    def sleep(self, seconds):
+        if seconds > 0:
+            self.now += seconds
+
+    def advance_to(self, timestamp):
+        """Avanza el reloj hasta timestamp (nunca retrocede)."""
+        if timestamp > self.now:
+            self.now = float(timestamp)
@@ -0,0 +1,19 @@
+import importlib.util
+import sys
+from pathlib import Path
+
+
+def load_carina(module_name="carina_o2"):
+    """Importa CARINAo-2.py como módulo (su nombre de archivo no es un identificador válido).
+
+    El módulo se registra en sys.modules para que sus clases y funciones se puedan
+    serializar con pickle, por ejemplo al repartir trabajo en un pool de procesos.
+    """
+    module = sys.modules.get(module_name)
+    if module is not None:
+        return module
+    spec = importlib.util.spec_from_file_location(module_name, Path(__file__).with_name("CARINAo-2.py"))
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[module_name] = module
+    spec.loader.exec_module(module)
+    return module
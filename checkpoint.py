@@ -0,0 +1,297 @@
+"""Checkpoints binarios de sesiones CARINA para reanudar la planificación tras un reinicio.
+
+El archivo empieza con MAGIC y sigue con registros [etiqueta: 1 byte][longitud: uint32 LE][datos]:
+  C  configuración de la sesión en JSON (opciones de CARINA y planificador), al principio
+  H  muestras nuevas del historial de rendimiento (float64 (n, 2), solo añadidos)
+  T  filas de telemetría del Meta Level desde un índice (uint64 + float64 (n, 5))
+  P  pasos del plan desde un índice (uint64 + JSON)
+  S  estado escalar de la sesión en JSON; el último registro S es el vigente
+
+Cada escritura añade solo lo nuevo desde la anterior. Un registro truncado al final (el
+proceso murió a mitad de escritura) se ignora al leer, así que se recupera el último
+estado completo.
+"""
+import json
+import struct
+from pathlib import Path
+
+import numpy as np
+
+from planners import planner_config, planner_from_config
+
+MAGIC = b"CARINACK\x01"
+_RECORD = struct.Struct("<cI")
+_START = struct.Struct("<Q")
+_HISTORY_COLUMNS = 2
+_TELEMETRY_COLUMNS = 5
+
+# Shared memory keys saved in the S record (the rest are derived or process-local)
+SHARED_KEYS = ("goal", "current_quality", "current_plan_length", "stop_signal")
+
+
+def _session_state(session):
+    shared_memory = session.shared_memory
+    object_level = session.object_level
+    meta_level = session.meta_level
+    planner = object_level.planner
+    plot_data = meta_level.plot_data
+    return {
+        "elapsed": session.clock.time() - shared_memory.read("start_time"),
+        "shared": {key: shared_memory.read(key) for key in SHARED_KEYS},
+        "object_level": {
+            "iteration_count": object_level.iteration_count,
+            "running": object_level.running,
+            "planner": planner.state() if hasattr(planner, "state") else None,
+        },
+        "meta_level": {
+            "history_cursor": meta_level._history_cursor,
+            "predictor": meta_level.performance_predictor.state(),
+            "object_level_running": meta_level.object_level_running,
+            "next_interval": meta_level.next_interval,
+            "monitoring_ticks": meta_level.monitoring_ticks,
+            "monitoring_cpu_time": meta_level.monitoring_cpu_time,
+            "intervals": [meta_level._interval_sum, meta_level._interval_min, meta_level._interval_max],
+            "stop": [plot_data[name] for name in plot_data.STOP_FIELDS],
+        },
+        "telemetry": {"stride": plot_data.stride, "offered": plot_data._offered},
+    }
+
+
+def _session_config(session):
+    return {"options": session.options, "planner": planner_config(session.object_level.planner)}
+
+
+def _normalized(value):
+    # As it reads back from the file (tuples become lists)
+    return json.loads(json.dumps(value))
+
+
+def resume_options(config, options):
+    """Opciones de CARINA para reanudar: las guardadas en config más las de ejecución de options.
+
+    Una opción de options que también está guardada debe tener el mismo valor. Si options no
+    trae planner ni planner_factory, el planificador se reconstruye desde config.
+    """
+    if config is None:
+        return dict(options)  # Written before configurations were saved: options decide
+    saved = config["options"]
+    conflicts = sorted(name for name, value in options.items()
+                       if name in saved and _normalized(value) != saved[name])
+    if conflicts:
+        details = ", ".join(f"{name}={options[name]!r} (guardado {saved[name]!r})" for name in conflicts)
+        raise ValueError(f"Opciones distintas de las del checkpoint: {details}.")
+    merged = {**saved, **options}
+    if options.get("planner") is None and options.get("planner_factory") is None:
+        merged["planner"] = planner_from_config(config["planner"])
+    return merged
+
+
+def check_planner(planner, config):
+    """Comprueba que planner es del tipo (y con la configuración) del checkpoint."""
+    if config is None:
+        return
+    saved = config["planner"]
+    current = planner_config(planner)
+    if current["type"] != saved["type"]:
+        raise ValueError(f"El checkpoint se escribió con el planificador {saved['type']}, no {current['type']}.")
+    if current["config"] is not None and saved["config"] is not None \
+            and _normalized(current["config"]) != saved["config"]:
+        raise ValueError(f"La configuración del planificador {saved['type']} no coincide con la del checkpoint.")
+
+
+class SessionCheckpointer:
+    """Escribe checkpoints incrementales de una sesión CARINA en path.
+
+    Por defecto path se trunca y empieza un checkpoint nuevo. Con resume=True (la sesión se
+    restauró de path con CARINA.resume) se sigue añadiendo al mismo archivo. No admite el
+    backend "process": el estado del Object Level vive en el proceso hijo.
+    """
+
+    def __init__(self, session, path, resume=False):
+        if getattr(session, "backend", "thread") == "process":
+            # The parent only holds the ObjectLevel as it was before the fork: saving it would resume stale state
+            raise ValueError('Los checkpoints no están disponibles con el backend "process".')
+        self.session = session
+        self.path = Path(path)
+        if resume:
+            with open(self.path, "rb") as existing:
+                if existing.read(len(MAGIC)) != MAGIC:
+                    raise ValueError(f"{self.path} no es un checkpoint de CARINA.")
+        self._file = open(self.path, "ab" if resume else "wb")
+        if resume:
+            # The session was restored from this file: everything it holds is already written
+            self._history_cursor = session.shared_memory.history.total_appended
+            self._telemetry_cursor = len(session.meta_level.plot_data)
+            self._plan_written = len(session.object_level.current_plan)
+        else:
+            self._history_cursor = 0
+            self._telemetry_cursor = 0
+            self._plan_written = 0
+        self._telemetry_stride = session.meta_level.plot_data.stride
+        self._plan_ref = session.object_level.current_plan
+        self.bytes_written = 0
+        if not resume:
+            self._file.write(MAGIC)
+            self.bytes_written += len(MAGIC)
+            self._record(b"C", json.dumps(_session_config(session), separators=(",", ":")).encode("utf-8"))
+            self._file.flush()
+
+    def _record(self, tag, payload):
+        self._file.write(_RECORD.pack(tag, len(payload)))
+        self._file.write(payload)
+        self.bytes_written += _RECORD.size + len(payload)
+
+    def write(self):
+        """Añade al archivo lo nuevo desde la última escritura y el estado actual."""
+        # State first: the records written after it always cover what it refers to
+        state = _session_state(self.session)
+
+        samples, self._history_cursor = self.session.shared_memory.history.since(self._history_cursor)
+        if len(samples):
+            self._record(b"H", np.ascontiguousarray(samples, dtype="<f8").tobytes())
+
+        plot_data = self.session.meta_level.plot_data
+        if plot_data.stride != self._telemetry_stride or len(plot_data) < self._telemetry_cursor:
+            # Decimation rewrote the stored points: resend them all
+            self._telemetry_cursor = 0
+            self._telemetry_stride = plot_data.stride
+        if len(plot_data) > self._telemetry_cursor:
+            rows = plot_data.rows(self._telemetry_cursor)
+            self._record(b"T", _START.pack(self._telemetry_cursor) + rows.astype("<f8").tobytes())
+            self._telemetry_cursor = len(plot_data)
+
+        plan = self.session.object_level.current_plan
+        if plan is not self._plan_ref or len(plan) < self._plan_written:
+            # The planner replaced its plan (e.g. a better A* incumbent): resend it whole
+            self._plan_written = 0
+            self._plan_ref = plan
+        if len(plan) > self._plan_written:
+            steps = json.dumps(plan[self._plan_written:], ensure_ascii=False, separators=(",", ":"))
+            self._record(b"P", _START.pack(self._plan_written) + steps.encode("utf-8"))
+            self._plan_written = len(plan)
+
+        self._record(b"S", json.dumps(state, separators=(",", ":")).encode("utf-8"))
+        self._file.flush()
+        return self.bytes_written
+
+    def attach(self, every=1):
+        """Escribe un checkpoint cada `every` ciclos del Meta Level (y al terminar la monitorización)."""
+        calls = [0]
+
+        def on_tick(plot_data):
+            calls[0] += 1
+            if calls[0] % every == 0 or not self.session.meta_level.object_level_running:
+                self.write()
+
+        self.session.meta_level.tick_listeners.append(on_tick)
+        return self
+
+    def close(self):
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+def read_checkpoint(path):
+    """Lee un checkpoint y devuelve {"history", "telemetry", "plan", "state", "config"} con el último estado completo."""
+    data = Path(path).read_bytes()
+    if not data.startswith(MAGIC):
+        raise ValueError(f"{path} no es un checkpoint de CARINA.")
+    history = []
+    telemetry = []  # Chunks; a T record first trims them to its start index
+    telemetry_rows = 0
+    plan = []
+    state = None
+    config = None
+    offset = len(MAGIC)
+    while offset + _RECORD.size <= len(data):
+        tag, length = _RECORD.unpack_from(data, offset)
+        start = offset + _RECORD.size
+        if start + length > len(data):
+            break  # Truncated last record
+        payload = data[start:start + length]
+        offset = start + length
+        if tag == b"H":
+            history.append(np.frombuffer(payload, dtype="<f8").reshape(-1, _HISTORY_COLUMNS))
+        elif tag == b"T":
+            (first,) = _START.unpack_from(payload)
+            rows = np.frombuffer(payload, dtype="<f8", offset=_START.size).reshape(-1, _TELEMETRY_COLUMNS)
+            while telemetry_rows > first:
+                excess = telemetry_rows - first
+                if len(telemetry[-1]) <= excess:
+                    telemetry_rows -= len(telemetry.pop())
+                else:
+                    telemetry[-1] = telemetry[-1][:-excess]
+                    telemetry_rows = first
+            telemetry.append(rows)
+            telemetry_rows += len(rows)
+        elif tag == b"P":
+            (first,) = _START.unpack_from(payload)
+            plan[first:] = json.loads(payload[_START.size:].decode("utf-8"))
+        elif tag == b"S":
+            state = payload  # Only the last one is decoded
+        elif tag == b"C":
+            config = json.loads(payload.decode("utf-8"))
+        else:
+            raise ValueError(f"Registro desconocido {tag!r} en {path}.")
+    history = np.concatenate(history) if history else np.empty((0, _HISTORY_COLUMNS))
+    telemetry = np.concatenate(telemetry) if telemetry else np.empty((0, _TELEMETRY_COLUMNS))
+    state = json.loads(state.decode("utf-8")) if state is not None else None
+    return {"history": history, "telemetry": telemetry, "plan": plan, "state": state, "config": config}
+
+
+def restore_session(session, checkpoint):
+    """Carga un checkpoint (de read_checkpoint) en una sesión CARINA recién creada, lista para execute()."""
+    state = checkpoint["state"]
+    if state is None:
+        raise ValueError("El checkpoint no contiene ningún estado completo.")
+    shared_memory = session.shared_memory
+    object_level = session.object_level
+    meta_level = session.meta_level
+
+    # Shift the start so elapsed time continues from the checkpoint
+    start_time = session.clock.time() - state["elapsed"]
+    shared_memory.update("start_time", start_time)
+    object_level.start_time = meta_level.start_time = start_time
+    shared_memory.update_many({key: value for key, value in state["shared"].items() if value is not None})
+    for sample_time, sample_quality in checkpoint["history"]:
+        shared_memory.history.append(sample_time, sample_quality)
+
+    object_level_state = state["object_level"]
+    object_level.iteration_count = object_level_state["iteration_count"]
+    object_level.running = object_level_state["running"]
+    object_level.current_plan = list(checkpoint["plan"])
+    planner = object_level.planner
+    goal = state["shared"]["goal"]
+    if object_level_state["planner"] is not None and hasattr(planner, "load_state"):
+        planner.load_state(object_level_state["planner"], object_level.current_plan)
+        object_level.current_plan = planner.best_plan()
+        object_level._planning_goal = goal
+
+    meta_state = state["meta_level"]
+    meta_level._history_cursor = meta_state["history_cursor"]
+    meta_level.performance_predictor.load_state(meta_state["predictor"])
+    meta_level.object_level_running = meta_state["object_level_running"]
+    meta_level.next_interval = meta_state["next_interval"]
+    meta_level.monitoring_ticks = meta_state["monitoring_ticks"]
+    meta_level.monitoring_cpu_time = meta_state["monitoring_cpu_time"]
+    meta_level._interval_sum, meta_level._interval_min, meta_level._interval_max = meta_state["intervals"]
+    plot_data = meta_level.plot_data
+    plot_data.load_rows(0, checkpoint["telemetry"], **state["telemetry"])
+    for name, value in zip(plot_data.STOP_FIELDS, meta_state["stop"]):
+        plot_data[name] = value
+
+    # Resume on the original cadence: next step and next tick fall when they were due
+    elapsed = state["elapsed"]
+    history = checkpoint["history"]
+    if len(history):
+        object_level.first_step_delay = max(0.0, history[-1, 0] + object_level.step_interval - elapsed)
+    last_tick = checkpoint["telemetry"][-1, 0] if len(checkpoint["telemetry"]) else elapsed
+    meta_level.next_interval = max(0.0, last_tick + meta_state["next_interval"] - elapsed)
+
+    shared_memory.update("object_level_running_flag", object_level.running)
+    return session
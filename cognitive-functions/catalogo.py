@@ -0,0 +1,193 @@
+import gzip
+import heapq
+import json
+import re
+from pathlib import Path
+
+import numpy as np
+
+from planning import BASE_ACTIVIDADES, CachePerfiles
+
+NIVELES = {"básico": 1.0, "intermedio": 2.0, "avanzado": 3.0}
+
+# Weight of each matched tag in an activity's score for a profile
+PESOS = {"problema": 3.0, "objetivo": 2.0, "estilo": 1.0}
+
+_PALABRA = re.compile(r"\w+")
+
+
+def palabras_clave(texto):
+    """Palabras significativas (4+ letras, en minúsculas) de un objetivo o etiqueta."""
+    return [palabra for palabra in _PALABRA.findall(texto.lower()) if len(palabra) > 3]
+
+
+class Actividad:
+    __slots__ = ("id", "descripcion", "dificultad", "estilos", "problemas", "objetivos", "prerrequisitos")
+
+    def __init__(self, id, descripcion, dificultad=1.0, estilos=(), problemas=(), objetivos=(), prerrequisitos=()):
+        self.id = id
+        self.descripcion = descripcion
+        self.dificultad = float(dificultad)
+        self.estilos = tuple(estilos)
+        self.problemas = tuple(problemas)
+        self.objetivos = tuple(objetivos)
+        self.prerrequisitos = tuple(prerrequisitos)
+
+    def __repr__(self):
+        return f"Actividad({self.id!r}, dificultad={self.dificultad})"
+
+
+class CatalogoActividades:
+    """Catálogo de actividades con índices invertidos por estilo, problema y palabra de objetivo.
+
+    seleccionar() no recorre el catálogo por estudiante: la clasificación de candidatas de
+    cada perfil (estilo, problemas, palabras de los objetivos, nivel) se calcula una vez y
+    se guarda en una CachePerfiles propia. Después, elegir las actividades semanales es un
+    recorrido perezoso de esa clasificación con un heap que respeta los prerrequisitos, con
+    coste proporcional a las semanas del plan y no al tamaño del catálogo.
+    """
+
+    def __init__(self, actividades, capacidad_cache=1024):
+        self.actividades = list(actividades)
+        self._indice_id = {actividad.id: i for i, actividad in enumerate(self.actividades)}
+        if len(self._indice_id) != len(self.actividades):
+            raise ValueError("El catálogo tiene identificadores de actividad repetidos.")
+        self._prerrequisitos = []
+        for actividad in self.actividades:
+            try:
+                self._prerrequisitos.append(tuple(self._indice_id[p] for p in actividad.prerrequisitos))
+            except KeyError as error:
+                raise ValueError(f"Prerrequisito desconocido {error.args[0]!r} en la actividad {actividad.id!r}.") from None
+        self._por_estilo = {}
+        self._por_problema = {}
+        self._por_objetivo = {}
+        for i, actividad in enumerate(self.actividades):
+            for estilo in actividad.estilos:
+                self._por_estilo.setdefault(estilo, []).append(i)
+            for problema in actividad.problemas:
+                self._por_problema.setdefault(problema, []).append(i)
+            for palabra in {p for objetivo in actividad.objetivos for p in palabras_clave(objetivo)}:
+                self._por_objetivo.setdefault(palabra, []).append(i)
+        for indice in (self._por_estilo, self._por_problema, self._por_objetivo):
+            for etiqueta, posiciones in indice.items():
+                indice[etiqueta] = np.array(posiciones, dtype=np.intp)
+        self._dificultades = np.array([actividad.dificultad for actividad in self.actividades], dtype=np.float64)
+        self.cache = CachePerfiles(capacidad_cache)
+
+    @classmethod
+    def desde_registros(cls, registros, capacidad_cache=1024):
+        """Catálogo desde dicts con las claves de Actividad (solo id y descripcion son obligatorias)."""
+        return cls((Actividad(**registro) for registro in registros), capacidad_cache)
+
+    @classmethod
+    def cargar(cls, ruta, capacidad_cache=1024):
+        """Carga un catálogo JSON (lista de actividades) o NDJSON (.ndjson/.jsonl, una por línea), con o sin .gz."""
+        ruta = Path(ruta)
+        abrir = gzip.open if ruta.suffix == ".gz" else open
+        formato = ruta.suffixes[-2] if ruta.suffix == ".gz" and len(ruta.suffixes) > 1 else ruta.suffix
+        with abrir(ruta, "rt", encoding="utf-8") as archivo:
+            if formato in (".ndjson", ".jsonl"):
+                registros = [json.loads(linea) for linea in archivo if linea.strip()]
+            else:
+                registros = json.load(archivo)
+        return cls.desde_registros(registros, capacidad_cache)
+
+    @classmethod
+    def desde_base(cls):
+        """Catálogo mínimo con BASE_ACTIVIDADES, sin etiquetas ni prerrequisitos."""
+        return cls(Actividad(i, descripcion, dificultad=1.0) for i, descripcion in enumerate(BASE_ACTIVIDADES))
+
+    def __len__(self):
+        return len(self.actividades)
+
+    def __getitem__(self, id_actividad):
+        return self.actividades[self._indice_id[id_actividad]]
+
+    def _clasificar(self, estilo, problemas, palabras, nivel):
+        # Scores accumulate over posting arrays; each posting lists an activity at most once
+        puntuaciones = np.zeros(len(self.actividades))
+        if estilo in self._por_estilo:
+            puntuaciones[self._por_estilo[estilo]] += PESOS["estilo"]
+        for problema in problemas:
+            if problema in self._por_problema:
+                puntuaciones[self._por_problema[problema]] += PESOS["problema"]
+        for palabra in palabras:
+            if palabra in self._por_objetivo:
+                puntuaciones[self._por_objetivo[palabra]] += PESOS["objetivo"]
+        candidatas = np.flatnonzero(puntuaciones)
+        _, rango = self._orden_nivel(nivel)
+        # Highest score first, ties broken by closeness to the learner's level; ranks are unique and
+        # below len(catalog), so one exact float key replaces a two-key lexsort
+        clave = rango[candidatas] - puntuaciones[candidatas] * len(rango)
+        return tuple(candidatas[np.argsort(clave)].tolist())
+
+    def _ordenar_por_nivel(self, nivel):
+        objetivo_dificultad = NIVELES.get(nivel)
+        distancia = np.zeros_like(self._dificultades) if objetivo_dificultad is None \
+            else np.abs(self._dificultades - objetivo_dificultad)
+        orden = np.lexsort((np.arange(len(self.actividades)), self._dificultades, distancia))
+        rango = np.empty_like(orden)
+        rango[orden] = np.arange(len(orden))
+        return tuple(orden.tolist()), rango
+
+    def _orden_nivel(self, nivel):
+        """(orden, rango): actividades de la más cercana a la más lejana del nivel, y la posición de cada una."""
+        return self.cache.obtener(("orden", nivel), self._ordenar_por_nivel, nivel)
+
+    def clasificacion(self, estilo=None, problemas=(), objetivos=(), nivel=None):
+        """Índices de las actividades que encajan con el perfil, de más a menos adecuada (en caché)."""
+        problemas = frozenset(problemas)
+        palabras = frozenset(p for objetivo in objetivos for p in palabras_clave(objetivo))
+        clave = ("clasificacion", estilo, problemas, palabras, nivel)
+        return self.cache.obtener(clave, self._clasificar, estilo, problemas, palabras, nivel)
+
+    def seleccionar(self, semanas, estilo=None, problemas=(), objetivos=(), nivel=None):
+        """Una actividad distinta por semana; cada una aparece después de todos sus prerrequisitos.
+
+        Se eligen primero las actividades que encajan con el perfil y, si no bastan, las
+        más cercanas al nivel. Una actividad con prerrequisitos aún no elegidos espera en el
+        heap hasta que se eligen.
+        """
+        semanas = min(max(semanas, 0), len(self.actividades))
+        clasificadas = self.clasificacion(estilo, problemas, objetivos, nivel)
+        orden = None
+        elegidas = []
+        elegidas_set = set()
+        vistas = set()
+        disponibles = []  # Heap of positions in clasificadas + general order
+        bloqueadas = {}  # prerequisite index -> positions waiting on it
+        faltan = {}
+        posicion = 0
+        total = len(clasificadas)
+        while len(elegidas) < semanas:
+            # Pulled positions come in rank order, so any unblocked one beats everything not yet pulled
+            while not disponibles:
+                if posicion >= total:
+                    if orden is not None:
+                        break
+                    orden, _ = self._orden_nivel(nivel)
+                    clasificadas = clasificadas + orden
+                    total = len(clasificadas)
+                    continue
+                i = clasificadas[posicion]
+                if i not in vistas:
+                    vistas.add(i)
+                    pendientes = [p for p in self._prerrequisitos[i] if p not in elegidas_set]
+                    if pendientes:
+                        faltan[posicion] = len(pendientes)
+                        for p in pendientes:
+                            bloqueadas.setdefault(p, []).append(posicion)
+                    else:
+                        heapq.heappush(disponibles, posicion)
+                posicion += 1
+            if not disponibles:
+                break
+            elegida = heapq.heappop(disponibles)
+            i = clasificadas[elegida]
+            elegidas.append(self.actividades[i])
+            elegidas_set.add(i)
+            for esperando in bloqueadas.pop(i, ()):
+                faltan[esperando] -= 1
+                if not faltan[esperando]:
+                    heapq.heappush(disponibles, esperando)
+        return elegidas
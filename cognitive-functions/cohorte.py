@@ -0,0 +1,80 @@
+from datetime import datetime
+
+from planning import (
+    CACHE_PERFILES,
+    ESTRATEGIAS_POR_ESTILO,
+    ESTRATEGIAS_POR_PROBLEMA,
+    RNGReproducible,
+    componer_diagnostico,
+    estrategias_para_firma,
+    seleccionar_actividades,
+)
+
+COLUMNAS_PERFIL = ("nivel_usuario", "estilo_aprendizaje", "problemas_detectados", "objetivos", "duracion_semanas")
+
+
+class PRGeneratorCohorte:
+    """Genera planes de recomendación para una cohorte completa a partir de perfiles en columnas.
+
+    Las estrategias salen de una tabla precompilada indexada por (estilo, máscara de
+    problemas conocidos) y cada estudiante usa su propio RNGReproducible sembrado con
+    (semilla, id), de modo que su plan es reproducible y no depende del orden de la cohorte.
+    El plan de cada estudiante coincide con PRGenerator(..., rng=cohorte.rng_estudiante(id),
+    catalogo=cohorte.catalogo). Los diagnósticos se comparten con PRGenerator a través de la caché CachePerfiles.
+    """
+
+    def __init__(self, semilla=0, cache=None, catalogo=None):
+        self.semilla = semilla
+        self.catalogo = catalogo
+        self.fecha_generacion = datetime.now().strftime("%Y-%m-%d")
+        self.cache = cache if cache is not None else CACHE_PERFILES
+        self._bits_problema = {problema: 1 << i for i, problema in enumerate(ESTRATEGIAS_POR_PROBLEMA)}
+        self._tabla_estrategias = {}
+        for estilo in list(ESTRATEGIAS_POR_ESTILO) + [None]:
+            for mascara in range(1 << len(self._bits_problema)):
+                problemas = frozenset(p for p, bit in self._bits_problema.items() if mascara & bit)
+                self._tabla_estrategias[(estilo, mascara)] = estrategias_para_firma((estilo, problemas))
+
+    def rng_estudiante(self, id_estudiante):
+        """RNG reproducible de un estudiante, estable entre ejecuciones y procesos."""
+        return RNGReproducible(self.semilla, id_estudiante)
+
+    def estrategias(self, estilo, problemas):
+        mascara = 0
+        for problema in problemas:
+            mascara |= self._bits_problema.get(problema, 0)
+        clave = (estilo if estilo in ESTRATEGIAS_POR_ESTILO else None, mascara)
+        return list(self._tabla_estrategias[clave])
+
+    def diagnostico(self, nivel, estilo, problemas):
+        problemas = tuple(problemas)
+        return self.cache.obtener(("diagnostico", nivel, estilo, problemas), componer_diagnostico, nivel, estilo, problemas)
+
+    def actividades(self, id_estudiante, nivel, estilo, problemas, objetivos, duracion):
+        if self.catalogo is not None:
+            return [actividad.descripcion for actividad in
+                    self.catalogo.seleccionar(duracion, estilo, problemas, objetivos, nivel)]
+        return seleccionar_actividades(self.rng_estudiante(id_estudiante), duracion)
+
+    def generar_planes(self, perfiles):
+        """Recorre los perfiles en columnas y va entregando un plan por estudiante.
+
+        perfiles es un dict con una secuencia por cada nombre de COLUMNAS_PERFIL y,
+        opcionalmente, "id" con el identificador de cada estudiante (por defecto, su
+        posición). Si hay "id", cada plan lo incluye como "id_estudiante".
+        """
+        columnas = [perfiles[nombre] for nombre in COLUMNAS_PERFIL]
+        ids = perfiles.get("id")
+        for indice, (nivel, estilo, problemas, objetivos, duracion) in enumerate(zip(*columnas)):
+            id_estudiante = ids[indice] if ids is not None else indice
+            plan = {
+                "fecha_generacion": self.fecha_generacion,
+                "diagnostico": self.diagnostico(nivel, estilo, problemas),
+                "objetivos_personalizados": objetivos,
+                "estrategias_intervencion": self.estrategias(estilo, problemas),
+                "actividades_por_semana": self.actividades(id_estudiante, nivel, estilo, problemas, objetivos, duracion),
+                "duracion_plan": f"{duracion} semanas"
+            }
+            if ids is not None:
+                plan["id_estudiante"] = id_estudiante
+            yield plan
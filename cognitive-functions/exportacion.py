@@ -0,0 +1,110 @@
+import gzip
+import io
+import json
+from pathlib import Path
+
+FORMATOS = ("json", "ndjson", "txt")
+
+
+def fragmentos_plan(plan, formato="txt", compacto=False):
+    """Genera el documento de un plan por fragmentos, sin construirlo entero en memoria.
+
+    'json' produce el documento indentado de exportar_plan (o en una línea si compacto),
+    'ndjson' una sola línea JSON terminada en salto de línea y 'txt' el texto plano por secciones.
+    """
+    if formato == "json":
+        if compacto:
+            yield json.dumps(plan, ensure_ascii=False, separators=(",", ":"))
+        else:
+            yield json.dumps(plan, indent=4, ensure_ascii=False)
+    elif formato == "ndjson":
+        yield json.dumps(plan, ensure_ascii=False, separators=(",", ":")) + "\n"
+    elif formato == "txt":
+        yield f"PLAN DE RECOMENDACIÓN - Pensamiento Algebraico\nGenerado el: {plan['fecha_generacion']}\n\n"
+        yield f"Diagnóstico:\n{plan['diagnostico']}\n"
+        yield "Objetivos:\n" + "\n".join(f" - {o}" for o in plan["objetivos_personalizados"]) + "\n"
+        yield "Estrategias de intervención:\n" + "\n".join(f" - {e}" for e in plan["estrategias_intervencion"]) + "\n"
+        yield "Actividades por semana:\n" + "\n".join(f"Semana {i+1}: {a}" for i, a in enumerate(plan["actividades_por_semana"])) + "\n"
+        yield f"Duración estimada del plan: {plan['duracion_plan']}"
+    else:
+        raise ValueError("Formato no soportado. Usa 'json', 'ndjson' o 'txt'.")
+
+
+class EscritorPlanes:
+    """Escribe planes uno a uno en un archivo, socket o flujo, con memoria constante.
+
+    destino puede ser una ruta (se abre en binario; con comprimir=True o extensión .gz se
+    escribe gzip) o un objeto con write(), de texto o binario, p. ej. socket.makefile("wb").
+    En 'txt' los planes se separan con una línea en blanco; en 'ndjson' hay uno por línea; en
+    'json' forman un array que cerrar() termina, salvo con varios=False, que escribe un único
+    documento (como exportar_plan) y no admite un segundo plan.
+    """
+
+    def __init__(self, destino, formato="ndjson", comprimir=False, compacto=True, varios=True):
+        if formato not in FORMATOS:
+            raise ValueError("Formato no soportado. Usa 'json', 'ndjson' o 'txt'.")
+        self.formato = formato
+        self.compacto = compacto
+        self.varios = varios
+        self.planes_escritos = 0
+        self._cerrado = False
+        self._propio = None  # Objects opened here, closed in cerrar()
+        if isinstance(destino, (str, Path)):
+            comprimir = comprimir or str(destino).endswith(".gz")
+            self._propio = gzip.open(destino, "wb") if comprimir else open(destino, "wb")
+            self._flujo = self._propio
+        elif comprimir:
+            self._propio = gzip.GzipFile(fileobj=destino, mode="wb")
+            self._flujo = self._propio
+        else:
+            self._flujo = destino
+        self._texto = isinstance(self._flujo, io.TextIOBase)
+
+    def _escribir(self, fragmento):
+        self._flujo.write(fragmento if self._texto else fragmento.encode("utf-8"))
+
+    def _array_json(self):
+        return self.formato == "json" and self.varios
+
+    def escribir(self, plan):
+        if self.planes_escritos and not self.varios:
+            raise ValueError("Este escritor admite un único plan; usa varios=True o el formato 'ndjson'.")
+        if self._array_json():
+            if self.planes_escritos:
+                self._escribir("," if self.compacto else ",\n")
+            else:
+                self._escribir("[" if self.compacto else "[\n")
+        elif self.planes_escritos and self.formato == "txt":
+            self._escribir("\n\n")
+        for fragmento in fragmentos_plan(plan, self.formato, self.compacto):
+            self._escribir(fragmento)
+        self.planes_escritos += 1
+
+    def escribir_todos(self, planes):
+        for plan in planes:
+            self.escribir(plan)
+        return self.planes_escritos
+
+    def cerrar(self):
+        if self._array_json() and not self._cerrado:
+            if not self.planes_escritos:
+                self._escribir("[]")
+            else:
+                self._escribir("]" if self.compacto else "\n]")
+        self._cerrado = True
+        if self._propio is not None:
+            self._propio.close()
+        elif hasattr(self._flujo, "flush"):
+            self._flujo.flush()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.cerrar()
+
+
+def exportar_planes(planes, destino, formato="ndjson", comprimir=False, compacto=True):
+    """Vuelca un iterable de planes (p. ej. PRGeneratorCohorte.generar_planes) y devuelve cuántos se escribieron."""
+    with EscritorPlanes(destino, formato, comprimir, compacto) as escritor:
+        return escritor.escribir_todos(planes)
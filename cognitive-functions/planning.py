@@ -1,58 +1,225 @@
+from collections import OrderedDict
 from datetime import datetime
+from itertools import combinations
+import hashlib
 import random
-import json
+import struct
+import threading
+
+from exportacion import FORMATOS, EscritorPlanes, fragmentos_plan
+
+# Reglas de intervención: tablas compartidas por PRGenerator y el generador por cohortes
+ESTRATEGIAS_POR_PROBLEMA = {
+    "ansiedad matemática": "Terapia breve enfocada en desensibilización emocional y ejercicios de respiración antes de actividades algebraicas.",
+    "dificultad en razonamiento abstracto": "Uso de representaciones visuales y manipulables para mejorar el pensamiento simbólico.",
+}
+
+ESTRATEGIAS_POR_ESTILO = {
+    "visual": "Uso intensivo de mapas conceptuales, videos, esquemas y animaciones para introducir problemas.",
+    "auditivo": "Audios explicativos, discusiones guiadas y narración de problemas en voz alta.",
+    "kinestésico": "Resolución de problemas mediante simulaciones, juegos interactivos y dramatización matemática.",
+}
+
+ESTRATEGIAS_COMUNES = (
+    "Seguimiento semanal por parte de un tutor con feedback personalizado.",
+    "Evaluaciones formativas automatizadas basadas en IA.",
+)
+
+BASE_ACTIVIDADES = (
+    "Resolver sistemas de ecuaciones aplicados a la vida cotidiana.",
+    "Crear y representar gráficamente funciones lineales y cuadráticas.",
+    "Simular situaciones reales con variables y restricciones algebraicas.",
+    "Gamificación: juegos matemáticos para resolver acertijos algebraicos.",
+    "Proyectos: diseñar un presupuesto familiar usando ecuaciones.",
+    "IA simbólica: resolver problemas con ayuda de un asistente basado en reglas.",
+)
+
+_ENTEROS_POR_BLOQUE = struct.Struct("<16I")
+
+
+class RNGReproducible:
+    """Generador determinista y barato por estudiante, derivado de BLAKE2b(semilla:clave).
+
+    Sustituye a random.Random(semilla) cuando hay que crear uno por estudiante: sembrar
+    un Mersenne Twister cuesta más que generar el plan entero. Implementa sample y shuffle.
+    """
+
+    def __init__(self, semilla, clave=""):
+        self._origen = f"{semilla}:{clave}".encode()
+        self._bloque = 0
+        self._pendientes = []
+
+    def _enteros(self, cantidad):
+        # 32-bit draws from the keyed digest stream, 16 per BLAKE2b block
+        while len(self._pendientes) < cantidad:
+            bloque = hashlib.blake2b(self._origen, digest_size=64, salt=self._bloque.to_bytes(16, "little")).digest()
+            self._pendientes.extend(_ENTEROS_POR_BLOQUE.unpack(bloque))
+            self._bloque += 1
+        valores = self._pendientes[:cantidad]
+        del self._pendientes[:cantidad]
+        return valores
+
+    def sample(self, poblacion, k):
+        elementos = list(poblacion)
+        n = len(elementos)
+        if not 0 <= k <= n:
+            raise ValueError("Muestra mayor que la población o negativa")
+        # Partial Fisher-Yates; the modulo bias is negligible for catalog-sized populations
+        for i, valor in enumerate(self._enteros(k)):
+            j = i + valor % (n - i)
+            elementos[i], elementos[j] = elementos[j], elementos[i]
+        return elementos[:k]
+
+    def shuffle(self, elementos):
+        elementos[:] = self.sample(elementos, len(elementos))
+
+
+def seleccionar_actividades(rng, duracion_semanas):
+    """Elige al azar una actividad distinta por semana (como mucho, todas las del catálogo base)."""
+    return rng.sample(BASE_ACTIVIDADES, min(max(duracion_semanas, 0), len(BASE_ACTIVIDADES)))
+
+
+def firma_estrategias(estilo_aprendizaje, problemas_detectados):
+    """Firma normalizada del perfil: solo lo que deciden las reglas (estilo conocido y problemas conocidos)."""
+    estilo = estilo_aprendizaje if estilo_aprendizaje in ESTRATEGIAS_POR_ESTILO else None
+    return estilo, frozenset(p for p in problemas_detectados if p in ESTRATEGIAS_POR_PROBLEMA)
+
+
+def estrategias_para_firma(firma):
+    estilo, problemas = firma
+    estrategias = [estrategia for problema, estrategia in ESTRATEGIAS_POR_PROBLEMA.items() if problema in problemas]
+
+    if estilo is not None:
+        estrategias.append(ESTRATEGIAS_POR_ESTILO[estilo])
+
+    estrategias.extend(ESTRATEGIAS_COMUNES)
+    return tuple(estrategias)
+
+
+def componer_diagnostico(nivel_usuario, estilo_aprendizaje, problemas_detectados):
+    resumen = f"Usuario con nivel {nivel_usuario} y estilo de aprendizaje {estilo_aprendizaje}.\n"
+    if problemas_detectados:
+        resumen += "Se detectaron las siguientes dificultades cognitivas/emocionales:\n"
+        resumen += "".join(f" - {p}\n" for p in problemas_detectados)
+    else:
+        resumen += "No se reportan dificultades cognitivas significativas.\n"
+    return resumen
+
+
+class CachePerfiles:
+    """Caché LRU acotada de diagnósticos y estrategias, compartida por todos los PRGenerator del proceso.
+
+    Las claves son firmas normalizadas del perfil. precalcular() llena una tabla fija (no
+    desalojable) con todas las combinaciones de estilo y problemas conocidos; exportar() y
+    cargar() permiten enviar esa tabla a procesos trabajadores (con fork la heredan sin más).
+    """
+
+    def __init__(self, capacidad=1024):
+        self.capacidad = capacidad
+        self.aciertos = 0
+        self.fallos = 0
+        self._entradas = OrderedDict()
+        self._tabla = {}
+        self._lock = threading.Lock()
+
+    def obtener(self, clave, calcular, *argumentos):
+        """Devuelve el valor de clave, calculándolo con calcular(*argumentos) si no está en caché."""
+        with self._lock:
+            valor = self._tabla.get(clave)
+            if valor is not None:
+                self.aciertos += 1
+                return valor
+            valor = self._entradas.get(clave)
+            if valor is not None:
+                self._entradas.move_to_end(clave)
+                self.aciertos += 1
+                return valor
+            self.fallos += 1
+        valor = calcular(*argumentos)
+        with self._lock:
+            self._entradas[clave] = valor
+            if len(self._entradas) > self.capacidad:
+                self._entradas.popitem(last=False)
+        return valor
+
+    def precalcular(self):
+        """Rellena la tabla fija de estrategias para todo estilo conocido (o ninguno) y todo subconjunto de problemas."""
+        problemas = list(ESTRATEGIAS_POR_PROBLEMA)
+        tabla = {}
+        for estilo in list(ESTRATEGIAS_POR_ESTILO) + [None]:
+            for n in range(len(problemas) + 1):
+                for subconjunto in combinations(problemas, n):
+                    firma = (estilo, frozenset(subconjunto))
+                    tabla[("estrategias", firma)] = estrategias_para_firma(firma)
+        with self._lock:
+            self._tabla.update(tabla)
+            return len(self._tabla)
+
+    def estadisticas(self):
+        with self._lock:
+            aciertos, fallos = self.aciertos, self.fallos
+            entradas, precalculadas = len(self._entradas), len(self._tabla)
+        consultas = aciertos + fallos
+        return {
+            "aciertos": aciertos,
+            "fallos": fallos,
+            "tasa_aciertos": aciertos / consultas if consultas else 0.0,
+            "entradas": entradas,
+            "precalculadas": precalculadas,
+        }
+
+    def exportar(self):
+        """Estado serializable con pickle (tabla fija y entradas LRU) para inicializar otros procesos."""
+        with self._lock:
+            return {"tabla": dict(self._tabla), "entradas": list(self._entradas.items())}
+
+    def cargar(self, estado):
+        with self._lock:
+            self._tabla.update(estado["tabla"])
+            for clave, valor in estado["entradas"]:
+                self._entradas[clave] = valor
+            while len(self._entradas) > self.capacidad:
+                self._entradas.popitem(last=False)
+
+    def limpiar(self):
+        with self._lock:
+            self._entradas.clear()
+            self._tabla.clear()
+            self.aciertos = 0
+            self.fallos = 0
+
+
+CACHE_PERFILES = CachePerfiles()
+
 
 class PRGenerator:
-    def __init__(self, nivel_usuario, estilo_aprendizaje, problemas_detectados, objetivos, duracion_semanas):
+    def __init__(self, nivel_usuario, estilo_aprendizaje, problemas_detectados, objetivos, duracion_semanas, rng=None,
+                 cache=None, catalogo=None):
         self.nivel_usuario = nivel_usuario
         self.estilo_aprendizaje = estilo_aprendizaje
         self.problemas_detectados = problemas_detectados
         self.objetivos = objetivos
         self.duracion_semanas = duracion_semanas
         self.fecha_generacion = datetime.now().strftime("%Y-%m-%d")
+        self.rng = rng or random  # random.Random(semilla) o RNGReproducible para planes reproducibles
+        self.cache = cache if cache is not None else CACHE_PERFILES
+        self.catalogo = catalogo  # CatalogoActividades; sin catálogo se sortean las BASE_ACTIVIDADES
 
     def diagnostico(self):
-        resumen = f"Usuario con nivel {self.nivel_usuario} y estilo de aprendizaje {self.estilo_aprendizaje}.\n"
-        if self.problemas_detectados:
-            resumen += "Se detectaron las siguientes dificultades cognitivas/emocionales:\n"
-            for p in self.problemas_detectados:
-                resumen += f" - {p}\n"
-        else:
-            resumen += "No se reportan dificultades cognitivas significativas.\n"
-        return resumen
+        problemas = tuple(self.problemas_detectados)
+        clave = ("diagnostico", self.nivel_usuario, self.estilo_aprendizaje, problemas)
+        return self.cache.obtener(clave, componer_diagnostico, self.nivel_usuario, self.estilo_aprendizaje, problemas)
 
     def definir_estrategias(self):
-        estrategias = []
-
-        if "ansiedad matemática" in self.problemas_detectados:
-            estrategias.append("Terapia breve enfocada en desensibilización emocional y ejercicios de respiración antes de actividades algebraicas.")
-        
-        if "dificultad en razonamiento abstracto" in self.problemas_detectados:
-            estrategias.append("Uso de representaciones visuales y manipulables para mejorar el pensamiento simbólico.")
-
-        if self.estilo_aprendizaje == "visual":
-            estrategias.append("Uso intensivo de mapas conceptuales, videos, esquemas y animaciones para introducir problemas.")
-        elif self.estilo_aprendizaje == "auditivo":
-            estrategias.append("Audios explicativos, discusiones guiadas y narración de problemas en voz alta.")
-        elif self.estilo_aprendizaje == "kinestésico":
-            estrategias.append("Resolución de problemas mediante simulaciones, juegos interactivos y dramatización matemática.")
-
-        estrategias.append("Seguimiento semanal por parte de un tutor con feedback personalizado.")
-        estrategias.append("Evaluaciones formativas automatizadas basadas en IA.")
-        
-        return estrategias
+        firma = firma_estrategias(self.estilo_aprendizaje, self.problemas_detectados)
+        return list(self.cache.obtener(("estrategias", firma), estrategias_para_firma, firma))
 
     def generar_actividades(self):
-        base_actividades = [
-            "Resolver sistemas de ecuaciones aplicados a la vida cotidiana.",
-            "Crear y representar gráficamente funciones lineales y cuadráticas.",
-            "Simular situaciones reales con variables y restricciones algebraicas.",
-            "Gamificación: juegos matemáticos para resolver acertijos algebraicos.",
-            "Proyectos: diseñar un presupuesto familiar usando ecuaciones.",
-            "IA simbólica: resolver problemas con ayuda de un asistente basado en reglas."
-        ]
-        random.shuffle(base_actividades)
-        return base_actividades[:self.duracion_semanas]
+        if self.catalogo is not None:
+            actividades = self.catalogo.seleccionar(self.duracion_semanas, self.estilo_aprendizaje,
+                                                    self.problemas_detectados, self.objetivos, self.nivel_usuario)
+            return [actividad.descripcion for actividad in actividades]
+        return seleccionar_actividades(self.rng, self.duracion_semanas)
 
     def generar_plan(self):
         return {
@@ -64,17 +231,13 @@ class PRGenerator:
             "duracion_plan": f"{self.duracion_semanas} semanas"
         }
 
-    def exportar_plan(self, formato='json'):
+    def exportar_plan(self, formato='json', destino=None, comprimir=False):
+        """Devuelve el plan como texto o, si se indica destino, lo escribe allí por fragmentos."""
+        if formato not in FORMATOS:
+            raise ValueError("Formato no soportado. Usa 'json', 'ndjson' o 'txt'.")
         plan = self.generar_plan()
-        if formato == 'json':
-            return json.dumps(plan, indent=4, ensure_ascii=False)
-        elif formato == 'txt':
-            texto = f"PLAN DE RECOMENDACIÓN - Pensamiento Algebraico\nGenerado el: {plan['fecha_generacion']}\n\n"
-            texto += f"Diagnóstico:\n{plan['diagnostico']}\n"
-            texto += f"Objetivos:\n" + "\n".join(f" - {o}" for o in plan["objetivos_personalizados"]) + "\n"
-            texto += "Estrategias de intervención:\n" + "\n".join(f" - {e}" for e in plan["estrategias_intervencion"]) + "\n"
-            texto += "Actividades por semana:\n" + "\n".join(f"Semana {i+1}: {a}" for i, a in enumerate(plan["actividades_por_semana"])) + "\n"
-            texto += f"Duración estimada del plan: {plan['duracion_plan']}"
-            return texto
-        else:
-            raise ValueError("Formato no soportado. Usa 'json' o 'txt'.")
+        if destino is not None:
+            with EscritorPlanes(destino, formato, comprimir, compacto=formato != 'json', varios=False) as escritor:
+                escritor.escribir(plan)
+            return None
+        return "".join(fragmentos_plan(plan, formato))
@@ -0,0 +1,99 @@
+import numpy as np
+
+
+class PerformanceHistory:
+    """Historial de rendimiento (timestamp, calidad) sobre un buffer NumPy preasignado.
+
+    Un único escritor (el Object Level) añade muestras sin bloqueo: la fila se escribe
+    primero y el contador se publica después, de modo que un lector nunca ve filas a
+    medio escribir. Las lecturas devuelven vistas de solo lectura sin copia.
+
+    Con max_len el historial queda acotado: el buffer se duplica en espejo (2 * max_len
+    filas) y cada muestra se escribe en ambas mitades, así las últimas max_len muestras
+    siempre forman una ventana contigua.
+    """
+
+    def __init__(self, capacity=256, max_len=None):
+        self.max_len = max_len
+        if max_len is not None:
+            capacity = max_len
+            self._buffer = np.empty((2 * max_len, 2), dtype=np.float64)
+        else:
+            self._buffer = np.empty((max(capacity, 1), 2), dtype=np.float64)
+        self._capacity = capacity
+        self._count = 0  # Total de muestras añadidas (publicado tras escribir la fila)
+
+    def append(self, timestamp, quality):
+        """Añade una muestra. Debe llamarse desde un único hilo escritor."""
+        count = self._count
+        if self.max_len is not None:
+            slot = count % self.max_len
+            self._buffer[slot] = (timestamp, quality)
+            self._buffer[slot + self.max_len] = (timestamp, quality)
+        else:
+            if count == self._capacity:
+                # Grow by doubling; views taken earlier keep pointing at the old buffer, which stays valid
+                grown = np.empty((2 * self._capacity, 2), dtype=np.float64)
+                grown[:count] = self._buffer[:count]
+                self._buffer = grown
+                self._capacity *= 2
+            self._buffer[count] = (timestamp, quality)
+        self._count = count + 1
+
+    def __len__(self):
+        if self.max_len is not None:
+            return min(self._count, self.max_len)
+        return self._count
+
+    @property
+    def total_appended(self):
+        """Número total de muestras añadidas, incluidas las descartadas en modo acotado."""
+        return self._count
+
+    def _window(self, count):
+        # Read the count before the buffer: any buffer published after it holds every row below count
+        buffer = self._buffer
+        if self.max_len is not None:
+            size = min(count, self.max_len)
+            start = (count - size) % self.max_len
+            view = buffer[start:start + size]
+        else:
+            view = buffer[:count]
+        view = view.view()
+        view.flags.writeable = False
+        return view
+
+    def snapshot(self):
+        """Vista de solo lectura (n, 2) con las muestras retenidas, de la más antigua a la más reciente.
+
+        En modo acotado la fila más antigua de la vista se sobrescribe en el siguiente
+        append; usa .copy() si necesitas conservarla más allá de eso.
+        """
+        return self._window(self._count)
+
+    def since(self, total_index):
+        """Muestras añadidas desde total_index (índice absoluto), limitadas a las retenidas.
+
+        Devuelve (vista, siguiente_indice); siguiente_indice es el cursor para la próxima llamada.
+        """
+        count = self._count
+        view = self._window(count)
+        retained_from = count - len(view)
+        return view[max(total_index - retained_from, 0):], count
+
+    def timestamps(self):
+        return self.snapshot()[:, 0]
+
+    def qualities(self):
+        return self.snapshot()[:, 1]
+
+    def last(self):
+        """Última muestra (timestamp, calidad) o None si el historial está vacío."""
+        count = self._count
+        if count == 0:
+            return None
+        if self.max_len is not None:
+            row = self._buffer[(count - 1) % self.max_len]
+        else:
+            row = self._buffer[count - 1]
+        return float(row[0]), float(row[1])
@@ -0,0 +1,226 @@
+import math
+
+# Below this rate * dt the saturating curve is linear to double precision
+_NEGLIGIBLE_DECAY = 1e-12
+
+
+class OnlinePerformancePredictor:
+    """Predictor de rendimiento en línea con estadísticos suficientes (O(1) por update y predicción).
+
+    Ajusta por mínimos cuadrados ponderados una recta y = a + b x sobre una transformación
+    del historial, manteniendo solo pesos, medias y co-momentos. Con forgetting < 1 cada
+    muestra antigua pierde peso de forma exponencial.
+
+    Familias:
+      - "log_linear":             q(t) = exp(a + b t) - 1
+      - "power_law":              q(t) = exp(a) (t + 1)^b - 1
+      - "saturating_exponential": q(t) = Q - (Q - q_last) exp(-k (t - t_last)),
+                                  ajustada sobre dq/dt = k Q - k q con el punto medio de muestras consecutivas.
+    """
+
+    FAMILIES = ("log_linear", "saturating_exponential", "power_law")
+
+    def __init__(self, family="log_linear", forgetting=1.0):
+        if family not in self.FAMILIES:
+            raise ValueError(f"Familia no soportada: {family}. Usa una de {self.FAMILIES}.")
+        if not 0.0 < forgetting <= 1.0:
+            raise ValueError("forgetting debe estar en (0, 1].")
+        self.family = family
+        self.forgetting = forgetting
+        self.reset()
+
+    def reset(self):
+        self.weight = 0.0
+        self.mean_x = 0.0
+        self.mean_y = 0.0
+        self.cxx = 0.0
+        self.cxy = 0.0
+        self.n_points = 0
+        self.n_observations = 0
+        self.last_time = None
+        self.last_quality = None
+
+    STATE_FIELDS = ("weight", "mean_x", "mean_y", "cxx", "cxy", "n_points", "n_observations", "last_time",
+                    "last_quality")
+
+    def state(self):
+        """Estadísticos suficientes del ajuste, serializables a JSON."""
+        return {"family": self.family, "forgetting": self.forgetting,
+                **{name: getattr(self, name) for name in self.STATE_FIELDS}}
+
+    def load_state(self, state):
+        if state["family"] != self.family:
+            raise ValueError(f"El estado es de la familia {state['family']}, no de {self.family}.")
+        self.forgetting = state["forgetting"]
+        for name in self.STATE_FIELDS:
+            setattr(self, name, state[name])
+
+    def _accumulate(self, x, y):
+        # Weighted Welford update: decaying the old weight keeps means unchanged and scales the co-moments
+        lam = self.forgetting
+        self.weight = lam * self.weight + 1.0
+        dx = x - self.mean_x
+        self.mean_x += dx / self.weight
+        self.mean_y += (y - self.mean_y) / self.weight
+        self.cxx = lam * self.cxx + dx * (x - self.mean_x)
+        self.cxy = lam * self.cxy + dx * (y - self.mean_y)
+        self.n_points += 1
+
+    def update(self, t, quality):
+        """Incorpora una observación (t, calidad)."""
+        t = float(t)
+        quality = float(quality)
+        if self.family == "log_linear":
+            self._accumulate(t, math.log1p(max(quality, 0.0)))
+        elif self.family == "power_law":
+            self._accumulate(math.log1p(max(t, 0.0)), math.log1p(max(quality, 0.0)))
+        elif self.last_time is not None and t > self.last_time:
+            rate = (quality - self.last_quality) / (t - self.last_time)
+            self._accumulate(0.5 * (quality + self.last_quality), rate)
+        self.last_time = t
+        self.last_quality = quality
+        self.n_observations += 1
+
+    @property
+    def ready(self):
+        """Hay al menos dos puntos con dispersión para ajustar la recta."""
+        if self.family == "saturating_exponential":
+            return self.n_points >= 1
+        return self.n_points >= 2 and self.cxx > 0.0
+
+    def coefficients(self):
+        """Intercepto y pendiente (a, b) de la recta ajustada en el espacio transformado."""
+        if self.cxx > 0.0:
+            slope = self.cxy / self.cxx
+        else:
+            slope = 0.0
+        return self.mean_y - slope * self.mean_x, slope
+
+    def parameters(self):
+        """Parámetros de la curva en su forma natural según la familia."""
+        a, b = self.coefficients()
+        if self.family == "saturating_exponential":
+            rate = -b
+            asymptote = a / rate if rate > 0.0 else math.inf
+            return {"rate": rate, "asymptote": asymptote, "t_last": self.last_time, "q_last": self.last_quality}
+        return {"a": a, "b": b}
+
+    def predict(self, t):
+        """Calidad de la curva ajustada en el instante t."""
+        if not self.ready:
+            return self.last_quality if self.last_quality is not None else 0.0
+        a, b = self.coefficients()
+        if self.family == "log_linear":
+            return math.exp(a + b * t) - 1
+        if self.family == "power_law":
+            return math.exp(a + b * math.log1p(max(t, 0.0))) - 1
+        rate = -b
+        dt = t - self.last_time
+        if rate <= 0.0:
+            # Not saturating (yet): extrapolate the average observed rate
+            return self.last_quality + self.mean_y * dt
+        # Relative to the last sample: with a near-linear ramp the fitted rate is float noise, and the
+        # asymptote form a / rate - (a / rate - q_last) exp(-rate dt) cancels every digit of the gain
+        initial_rate = a - rate * self.last_quality
+        x = rate * dt
+        if abs(x) < _NEGLIGIBLE_DECAY:
+            return self.last_quality + initial_rate * dt
+        return self.last_quality + initial_rate * -math.expm1(-x) / rate
+
+    def projected_gain(self, t, horizon):
+        """Mejora de calidad que la curva predice entre t y t + horizon."""
+        return self.predict(t + horizon) - self.predict(t)
+
+    def project(self, horizon):
+        """Calidad proyectada a horizon segundos de la última observación, anclada en su calidad real."""
+        if self.last_time is None:
+            return 0.0
+        return self.last_quality + self.projected_gain(self.last_time, horizon)
+
+    def predict_many(self, times):
+        """Versión vectorizada de predict sobre un array de instantes."""
+        import numpy as np
+
+        times = np.asarray(times, dtype=np.float64)
+        if not self.ready:
+            return np.full(times.shape, self.last_quality if self.last_quality is not None else 0.0)
+        a, b = self.coefficients()
+        if self.family == "log_linear":
+            return np.exp(a + b * times) - 1
+        if self.family == "power_law":
+            return np.exp(a + b * np.log1p(np.maximum(times, 0.0))) - 1
+        rate = -b
+        dt = times - self.last_time
+        if rate <= 0.0:
+            return self.last_quality + self.mean_y * dt
+        # Same stable form as predict()
+        initial_rate = a - rate * self.last_quality
+        x = rate * dt
+        growth = np.where(np.abs(x) < _NEGLIGIBLE_DECAY, dt, -np.expm1(-x) / rate)
+        return self.last_quality + initial_rate * growth
+
+    def optimal_stopping_time(self, cost_factor):
+        """Instante t >= última observación que maximiza q(t) - (exp(c t) - 1) bajo la curva ajustada."""
+        a, b = self.coefficients()
+        t_last = self.last_time if self.last_time is not None else 0.0
+        q_last = self.last_quality if self.last_quality is not None else 0.0
+        return optimal_stopping_time(self.family, a, b, cost_factor, t_last, q_last, self.mean_y)
+
+
+def optimal_stopping_time(family, a, b, cost_factor, t_last=0.0, q_last=0.0, mean_rate=0.0):
+    """Tiempo de parada óptimo para U(t) = q(t) - (exp(c t) - 1), con t >= t_last.
+
+    Todos los argumentos numéricos se difunden (broadcast) como arrays NumPy, de modo que
+    se pueden barrer millones de combinaciones de curva y coste de una vez. (a, b) son los
+    coeficientes de OnlinePerformancePredictor.coefficients() para la familia dada.
+    Devuelve np.inf cuando la utilidad crece sin límite (la calidad supera siempre al coste).
+    """
+    import numpy as np
+
+    a, b, c, t_last, q_last, mean_rate = np.broadcast_arrays(
+        *(np.asarray(v, dtype=np.float64) for v in (a, b, cost_factor, t_last, q_last, mean_rate)))
+    with np.errstate(divide="ignore", invalid="ignore", over="ignore"):
+        if family == "log_linear":
+            # U'(t) = b e^(a + b t) - c e^(c t): single root when 0 < b < c
+            root = (a + np.log(b) - np.log(c)) / (c - b)
+            optimum = np.where(b <= 0, t_last, root)
+            unbounded = (b > c) | ((b == c) & (b * np.exp(a) > c))
+            optimum = np.where(b >= c, np.where(unbounded, np.inf, t_last), optimum)
+        elif family == "saturating_exponential":
+            rate = -b
+            # U'(t) = k (Q - q_last) e^(-k (t - t_last)) - c e^(c t), with k (Q - q_last) = a - k q_last
+            # written without Q = a / k, which overflows precision when k is tiny
+            initial_rate = a - rate * q_last
+            saturating = (np.log(initial_rate / c) + rate * t_last) / (rate + c)
+            saturating = np.where(initial_rate > 0, saturating, t_last)
+            # Non-saturating fit falls back to a linear rate r: U'(t) = r - c e^(c t)
+            linear = np.where(mean_rate > 0, np.log(mean_rate / c) / c, t_last)
+            optimum = np.where(rate > 0, saturating, linear)
+        elif family == "power_law":
+            optimum = _power_law_stopping_time(a, b, c, t_last)
+        else:
+            raise ValueError(f"Familia no soportada: {family}.")
+        optimum = np.where(np.isnan(optimum), t_last, np.maximum(optimum, t_last))
+    return optimum if optimum.ndim else float(optimum)
+
+
+def _power_law_stopping_time(a, b, c, t_last, iterations=60):
+    # U'(t) = 0  <=>  g(t) = ln(b e^a) + (b - 1) ln(t + 1) - ln(c) - c t = 0. g is concave for b > 1
+    # and convex for b < 1 (the usual diminishing-returns fit), and decreasing right of `start` either way.
+    # Newton on a decreasing convex g started where g > 0 climbs monotonically to the root; on a concave
+    # g it starts right of the peak (g' = 0 there), first lands right of the root and then descends to it
+    import numpy as np
+
+    def g(t):
+        return a + np.log(b) + (b - 1) * np.log1p(t) - np.log(c) - c * t
+
+    start = np.maximum(t_last, (b - 1) / c - 1)
+    rising = (b > 0) & (g(start) > 0)
+    t = np.where(rising, np.where(b > 1, start + 1.0, start), t_last)
+    for _ in range(iterations):
+        slope = (b - 1) / (t + 1) - c
+        step = np.where(rising, g(t) / slope, 0.0)
+        t = t - step
+        if np.all(np.abs(step) <= 1e-12 * np.maximum(1.0, np.abs(t))):
+            break
+    return np.where(rising, t, t_last)
@@ -0,0 +1,271 @@
+"""Planificadores anytime que el Object Level ejecuta paso a paso bajo el control del Meta Level.
+
+Un planificador implementa el protocolo AnytimePlanner: start(goal) prepara la búsqueda,
+step() hace una cantidad acotada de trabajo, quality() devuelve en O(1) la calidad de la
+mejor solución encontrada y best_plan() esa solución como lista de pasos.
+"""
+import heapq
+import itertools
+import time
+from typing import Protocol, runtime_checkable
+
+
+@runtime_checkable
+class AnytimePlanner(Protocol):
+    def start(self, goal):
+        """Reinicia la búsqueda para goal."""
+
+    def step(self):
+        """Hace una unidad acotada de trabajo; devuelve False cuando ya no puede mejorar el plan."""
+
+    def quality(self):
+        """Calidad de best_plan(); debe ser barata de consultar en cada ciclo de monitorización."""
+
+    def best_plan(self):
+        """Mejor plan encontrado hasta ahora (lista de pasos)."""
+
+# Planners may also implement state() -> JSON-serializable dict and load_state(state, plan) so that
+# checkpoint.py can resume them; planners without them restart from start(goal) after a restore.
+# config() -> JSON-serializable dict and the classmethod from_config(config) let CARINA.resume rebuild
+# the planner from the checkpoint alone; see planner_config() and planner_from_config().
+
+
+class StepCountPlanner:
+    """Comportamiento original de CARINA: añade un paso por ciclo y la calidad es la longitud del plan."""
+
+    def __init__(self):
+        self.goal = None
+        self.plan = []
+
+    def start(self, goal):
+        self.goal = goal
+        self.plan = []
+
+    def step(self):
+        self.plan.append(f"Step {len(self.plan) + 1} towards {self.goal}")
+        return True
+
+    def quality(self):
+        return float(len(self.plan))
+
+    def best_plan(self):
+        return self.plan
+
+    def config(self):
+        return {}
+
+    @classmethod
+    def from_config(cls, config):
+        return cls()
+
+    def state(self):
+        return {"goal": self.goal}
+
+    def load_state(self, state, plan):
+        self.goal = state["goal"]
+        self.plan = list(plan)
+
+
+class CurriculumGraph:
+    """Grafo de currículo: actividades con dificultad y prerrequisitos.
+
+    Un plan es un orden de actividades que respeta los prerrequisitos y cubre las
+    actividades objetivo. Pasar de una actividad a otra cuesta 1 más smoothness veces el
+    cuadrado del salto de dificultad, así que los planes baratos suben la dificultad de forma gradual.
+    """
+
+    def __init__(self, activities, difficulties, prerequisite_masks, smoothness=1.0):
+        self.activities = tuple(activities)
+        self.difficulties = tuple(float(d) for d in difficulties)
+        self.prerequisite_masks = tuple(prerequisite_masks)
+        self.smoothness = smoothness
+        self.base_difficulty = min(self.difficulties, default=0.0)
+
+    @classmethod
+    def from_activities(cls, activities, difficulties=None, prerequisites=None, smoothness=1.0):
+        """Construye el grafo desde una lista de actividades (p. ej. las de PRGenerator).
+
+        difficulties es una secuencia paralela o un dict {actividad: dificultad} (por defecto,
+        la posición en la lista); prerequisites es un dict {actividad: [actividades previas]}.
+        """
+        activities = list(activities)
+        index = {activity: i for i, activity in enumerate(activities)}
+        if difficulties is None:
+            difficulties = range(len(activities))
+        elif isinstance(difficulties, dict):
+            difficulties = [difficulties[activity] for activity in activities]
+        masks = [0] * len(activities)
+        for activity, required in (prerequisites or {}).items():
+            for previous in required:
+                masks[index[activity]] |= 1 << index[previous]
+        return cls(activities, difficulties, masks, smoothness)
+
+    def config(self):
+        return {"activities": list(self.activities), "difficulties": list(self.difficulties),
+                "prerequisite_masks": list(self.prerequisite_masks), "smoothness": self.smoothness}
+
+    @classmethod
+    def from_config(cls, config):
+        return cls(**config)
+
+    def __len__(self):
+        return len(self.activities)
+
+    def transition_cost(self, last, following):
+        previous = self.base_difficulty if last < 0 else self.difficulties[last]
+        return 1.0 + self.smoothness * (self.difficulties[following] - previous) ** 2
+
+    def available(self, done_mask):
+        """Índices de actividades no hechas cuyos prerrequisitos ya están en done_mask."""
+        for i, required in enumerate(self.prerequisite_masks):
+            if not done_mask >> i & 1 and required & done_mask == required:
+                yield i
+
+
+class AnytimeWeightedAStarPlanner:
+    """A* ponderado anytime (Hansen y Zhou) sobre un CurriculumGraph.
+
+    Con weight > 1 encuentra pronto un primer plan y luego sigue expandiendo, podando con
+    el coste del mejor plan, hasta demostrar el óptimo. Cada step() hace como mucho
+    expansions_per_step expansiones y, si se indica, no supera step_time_budget segundos.
+
+    La calidad es scale * cota_inferior / coste_del_mejor_plan (0 sin plan), donde la cota
+    es la heurística admisible del estado inicial: crece cada vez que el plan mejora.
+    """
+
+    _TIME_CHECK_EVERY = 16  # Expansions between clock reads when a time budget is set
+
+    def __init__(self, graph, targets=None, weight=2.0, expansions_per_step=64, step_time_budget=None, scale=100.0):
+        self.graph = graph
+        if targets is None:
+            self.target_mask = (1 << len(graph)) - 1
+        else:
+            self.target_mask = 0
+            for activity in targets:
+                self.target_mask |= 1 << graph.activities.index(activity)
+        self.weight = weight
+        self.expansions_per_step = expansions_per_step
+        self.step_time_budget = step_time_budget
+        self.scale = scale
+        self.goal = None
+        self.start(None)
+
+    def config(self):
+        return {"graph": self.graph.config(), "target_mask": self.target_mask, "weight": self.weight,
+                "expansions_per_step": self.expansions_per_step, "step_time_budget": self.step_time_budget,
+                "scale": self.scale}
+
+    @classmethod
+    def from_config(cls, config):
+        planner = cls(CurriculumGraph.from_config(config["graph"]), weight=config["weight"],
+                      expansions_per_step=config["expansions_per_step"],
+                      step_time_budget=config["step_time_budget"], scale=config["scale"])
+        planner.target_mask = config["target_mask"]
+        planner.start(None)
+        return planner
+
+    def _heuristic(self, done_mask):
+        # Every pending target costs at least 1
+        return float(bin(self.target_mask & ~done_mask).count("1"))
+
+    def start(self, goal):
+        self.goal = goal
+        self.expansions = 0
+        self.exhausted = False
+        self.best_cost = float("inf")
+        self._incumbent = None
+        self._plan = []
+        self._lower_bound = self._heuristic(0)
+        self._tie = itertools.count()
+        # Open entries: (weighted f, tie-break, g, done mask, last activity, path node)
+        self._open = [(self.weight * self._lower_bound, next(self._tie), 0.0, 0, -1, None)]
+        self._best_g = {(0, -1): 0.0}
+
+    def step(self):
+        if self.exhausted:
+            return False
+        graph = self.graph
+        heuristic = self._heuristic
+        open_list = self._open
+        best_g = self._best_g
+        deadline = None if self.step_time_budget is None else time.perf_counter() + self.step_time_budget
+        for expansion in range(self.expansions_per_step):
+            if not open_list:
+                # Nothing left to prune against: the incumbent is optimal
+                self.exhausted = True
+                return False
+            if deadline is not None and expansion % self._TIME_CHECK_EVERY == 0 and expansion \
+                    and time.perf_counter() > deadline:
+                break
+            _, _, g, done, last, node = heapq.heappop(open_list)
+            if g > best_g.get((done, last), g) or g + heuristic(done) >= self.best_cost:
+                continue
+            self.expansions += 1
+            if done & self.target_mask == self.target_mask:
+                self.best_cost = g
+                self._incumbent = node
+                self._plan = None
+                continue
+            for following in graph.available(done):
+                g_next = g + graph.transition_cost(last, following)
+                done_next = done | 1 << following
+                h_next = heuristic(done_next)
+                key = (done_next, following)
+                if g_next + h_next >= self.best_cost or g_next >= best_g.get(key, float("inf")):
+                    continue
+                best_g[key] = g_next
+                heapq.heappush(open_list, (g_next + self.weight * h_next, next(self._tie), g_next, done_next,
+                                           following, (following, node)))
+        return True
+
+    def quality(self):
+        if self.best_cost == float("inf"):
+            return 0.0
+        if self.best_cost == 0:
+            return self.scale
+        return self.scale * self._lower_bound / self.best_cost
+
+    def state(self):
+        # The open list is not saved: a resumed search restarts, pruning with the saved incumbent
+        return {"goal": self.goal, "best_cost": None if self.best_cost == float("inf") else self.best_cost,
+                "expansions": self.expansions}
+
+    def load_state(self, state, plan):
+        self.start(state["goal"])
+        self.expansions = state["expansions"]
+        if state["best_cost"] is not None:
+            self.best_cost = state["best_cost"]
+            node = None
+            for activity in plan:
+                node = (self.graph.activities.index(activity), node)
+            self._incumbent = node
+            self._plan = list(plan)
+
+    def best_plan(self):
+        if self._plan is None:
+            # Rebuild the activity list only when the incumbent changed
+            steps = []
+            node = self._incumbent
+            while node is not None:
+                steps.append(self.graph.activities[node[0]])
+                node = node[1]
+            self._plan = steps[::-1]
+        return self._plan
+
+
+PLANNERS = {planner.__name__: planner for planner in (StepCountPlanner, AnytimeWeightedAStarPlanner)}
+
+
+def planner_config(planner):
+    """{"type", "config"} de un planificador; config es None si no implementa config()."""
+    config = planner.config() if hasattr(planner, "config") else None
+    return {"type": type(planner).__name__, "config": config}
+
+
+def planner_from_config(description):
+    """Reconstruye un planificador de PLANNERS a partir de planner_config()."""
+    planner_type = PLANNERS.get(description["type"])
+    if planner_type is None or description["config"] is None:
+        raise ValueError(f"No se puede reconstruir el planificador {description['type']!r}: "
+                         "pasa planner o planner_factory.")
+    return planner_type.from_config(description["config"])
@@ -0,0 +1,181 @@
+"""Gráficas de la dinámica de utilidad del Meta Level.
+
+matplotlib se importa solo al dibujar. Las funciones de renderizado por lotes usan la API
+orientada a objetos con el backend Agg (sin ventanas ni estado global de pyplot), así que
+funcionan en servicios sin pantalla y en paralelo en varios procesos.
+"""
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+LINE_STYLES = {
+    "intrinsic_values": dict(label='Intrinsic Value Function (Quality)', color='green', linestyle='-', linewidth=2),
+    "time_costs": dict(label='Cost of Time (Magnitude)', color='red', linestyle=':', linewidth=2),
+    "total_utilities": dict(label='Time-Dependent Utility (Net)', color='blue', linewidth=2.5),
+}
+
+
+def _agg_figure(figsize=(10, 7)):
+    from matplotlib.backends.backend_agg import FigureCanvasAgg
+    from matplotlib.figure import Figure
+
+    figure = Figure(figsize=figsize) # Slightly taller for better annotation space
+    FigureCanvasAgg(figure)
+    return figure
+
+
+def draw_utility_plot(ax, plot_data):
+    """Dibuja valor intrínseco, coste del tiempo, utilidad neta y el punto de parada sobre ax."""
+    times = np.asarray(plot_data["times"])
+    # Ensure all plot data arrays are of the same length before plotting
+    min_len = len(times)
+    intrinsic_values = np.asarray(plot_data["intrinsic_values"][:min_len])
+    time_costs = np.asarray(plot_data["time_costs"][:min_len])
+    total_utilities = np.asarray(plot_data["total_utilities"][:min_len])
+
+    ax.plot(times, intrinsic_values, **LINE_STYLES["intrinsic_values"])
+    ax.plot(times, time_costs, **LINE_STYLES["time_costs"])
+    ax.plot(times, total_utilities, **LINE_STYLES["total_utilities"])
+
+    optimal_time = plot_data.get("optimal_stop_time")
+    optimal_utility = plot_data.get("optimal_stop_utility")
+
+    if optimal_time is not None and optimal_utility is not None:
+        ax.scatter([optimal_time], [optimal_utility], color='black', s=120, zorder=5, label='Optimal Stopping Point', marker='X')
+        ax.vlines(optimal_time, min(0, np.min(total_utilities) if total_utilities.size > 0 else 0), optimal_utility, colors='dimgray', linestyles='dashdot', zorder=0)
+        ax.hlines(optimal_utility, 0, optimal_time, colors='dimgray', linestyles='dashdot', zorder=0)
+
+        optimal_quality_at_stop = plot_data.get("optimal_stop_quality", "N/A")
+        annotation_text = (f"Stop Point\n"
+                           f"Time: {optimal_time:.2f}s\n"
+                           f"Net Utility: {optimal_utility:.2f}\n"
+                           f"Quality: {optimal_quality_at_stop:.1f}")
+
+        # Adjust annotation position dynamically
+        text_x_offset = (times.max() - times.min()) * 0.05 # 5% of x-range
+        text_y_offset = (max(np.max(intrinsic_values), np.max(total_utilities)) - min(0, np.min(total_utilities))) * 0.05 # 5% of y-range
+
+        # Heuristic for placing annotation to avoid overlap
+        if optimal_time > times.mean(): # If stopping point is in the right half
+            annot_x = optimal_time - text_x_offset
+            ha = 'right'
+        else: # If stopping point is in the left half
+            annot_x = optimal_time + text_x_offset
+            ha = 'left'
+
+        if optimal_utility > total_utilities.mean(): # If stopping point is in the upper half
+            annot_y = optimal_utility - text_y_offset
+            va = 'top'
+        else:
+            annot_y = optimal_utility + text_y_offset
+            va = 'bottom'
+
+        ax.annotate(annotation_text,
+                    xy=(optimal_time, optimal_utility),
+                    xytext=(annot_x, annot_y),
+                    arrowprops=dict(facecolor='black', shrink=0.05, width=1, headwidth=6),
+                    bbox=dict(boxstyle="round,pad=0.5", fc="ivory", ec="gray", alpha=0.9),
+                    fontsize=9,
+                    ha=ha, va=va)
+
+    ax.set_xlabel('Time (seconds)')
+    ax.set_ylabel('Utility')
+    ax.set_title('Meta-Level Control: Utility Dynamics Over Time', fontsize=14)
+    ax.legend(loc='best')
+    ax.grid(True, linestyle='--', alpha=0.6)
+
+    # Adjust y-limits to ensure visibility of curves, especially if utility goes negative
+    y_min_plot = min(0, np.min(total_utilities) if total_utilities.size > 0 else 0, np.min(time_costs) if time_costs.size > 0 else 0)
+    y_max_plot = max(np.max(intrinsic_values) if intrinsic_values.size > 0 else 1, np.max(total_utilities) if total_utilities.size > 0 else 1)
+    ax.set_ylim(y_min_plot - abs(y_min_plot*0.1) - 1, y_max_plot + abs(y_max_plot*0.1) +1) # Add some padding
+
+    ax.axhline(0, color='black', linewidth=0.5, linestyle='-') # X-axis line
+
+
+def render_utility_plot(plot_data, path, dpi=100):
+    """Renderiza la gráfica a un archivo (png, svg, pdf...) con Agg, sin tocar pyplot."""
+    figure = _agg_figure()
+    draw_utility_plot(figure.add_subplot(), plot_data)
+    figure.tight_layout()
+    figure.savefig(path, dpi=dpi)
+    return path
+
+
+def _render_job(job):
+    plot_data, path, dpi = job
+    return render_utility_plot(plot_data, path, dpi)
+
+
+def render_many(runs, processes=None, dpi=100):
+    """Renderiza en paralelo una gráfica por ejecución; runs es un iterable de (plot_data, ruta)."""
+    jobs = [(plot_data, path, dpi) for plot_data, path in runs]
+    if processes == 1:
+        return [_render_job(job) for job in jobs]
+    with ProcessPoolExecutor(max_workers=processes) as pool:
+        return list(pool.map(_render_job, jobs))
+
+
+def plot_utility_vs_time(plot_data):
+    """Muestra la gráfica en una ventana interactiva de pyplot al final de una ejecución."""
+    if not plot_data or len(plot_data["times"]) == 0:
+        print("No data to plot.")
+        return
+
+    import matplotlib.pyplot as plt
+
+    figure = plt.figure(figsize=(10, 7))
+    draw_utility_plot(figure.add_subplot(), plot_data)
+    figure.tight_layout()
+    plt.show()
+
+
+class LivePlot:
+    """Gráfica en vivo: en cada ciclo del Meta Level actualiza las líneas existentes en lugar de redibujar la figura.
+
+    Con interactive=False usa Agg y sirve para volcar fotogramas con save(); con
+    interactive=True abre una ventana de pyplot, que debe manejarse desde el hilo principal
+    (por ejemplo, con CARINAScheduler o un VirtualClock).
+    """
+
+    def __init__(self, interactive=False):
+        self.interactive = interactive
+        if interactive:
+            import matplotlib.pyplot as plt
+
+            plt.ion()
+            self.figure = plt.figure(figsize=(10, 7))
+        else:
+            self.figure = _agg_figure()
+        self.ax = self.figure.add_subplot()
+        self.lines = {name: self.ax.plot([], [], **style)[0] for name, style in LINE_STYLES.items()}
+        self.ax.set_xlabel('Time (seconds)')
+        self.ax.set_ylabel('Utility')
+        self.ax.set_title('Meta-Level Control: Utility Dynamics Over Time', fontsize=14)
+        self.ax.legend(loc='best')
+        self.ax.grid(True, linestyle='--', alpha=0.6)
+        self.ax.axhline(0, color='black', linewidth=0.5, linestyle='-') # X-axis line
+        self._stop_marker = None
+
+    def attach(self, meta_level):
+        """Se suscribe a los ciclos de monitorización de un MetaLevel."""
+        meta_level.tick_listeners.append(self.update)
+        return self
+
+    def update(self, plot_data):
+        # Recorder columns are zero-copy views, so this only swaps the artists' data
+        times = plot_data["times"]
+        for name, line in self.lines.items():
+            line.set_data(times, plot_data[name])
+        optimal_time = plot_data.get("optimal_stop_time")
+        if optimal_time is not None and self._stop_marker is None:
+            self._stop_marker = self.ax.scatter([optimal_time], [plot_data.get("optimal_stop_utility")], color='black',
+                                                s=120, zorder=5, label='Optimal Stopping Point', marker='X')
+        self.ax.relim()
+        self.ax.autoscale_view()
+        self.figure.canvas.draw_idle()
+        if self.interactive:
+            self.figure.canvas.flush_events()
+
+    def save(self, path, dpi=100):
+        self.figure.savefig(path, dpi=dpi)
+        return path
@@ -0,0 +1,226 @@
+"""Memoria compartida entre procesos para ejecutar Object Level y Meta Level en procesos distintos.
+
+Las claves numéricas (calidad, longitud del plan, señales y marcas de tiempo) y el historial
+de rendimiento viven en un bloque de multiprocessing.shared_memory con un layout fijo, y se
+leen a través de vistas NumPy sin copia. El resto de claves (goal, final_plan, plot_data_final)
+se guardan en un dict local a cada proceso: para devolverlas hay que usar una cola.
+"""
+import multiprocessing
+import os
+import weakref
+from multiprocessing import shared_memory
+
+import numpy as np
+
+from performance_history import PerformanceHistory
+
+# Fixed header layout: one float64 value slot and one int64 version per key
+NUMERIC_KEYS = ("start_time", "current_quality", "current_plan_length", "stop_signal", "object_level_running_flag",
+                "stop_signal_time", "halt_time", "stop_latency")
+_SLOTS = {key: i for i, key in enumerate(NUMERIC_KEYS)}
+_KEY_TYPES = {"current_plan_length": int, "stop_signal": bool, "object_level_running_flag": bool}
+
+
+def _segment_size(history_max_len):
+    # values + versions + history counter + mirrored (timestamp, quality) ring
+    return 8 * (2 * len(NUMERIC_KEYS) + 1 + 4 * history_max_len)
+
+
+def _release_segment(segment, owner_pid=None):
+    segment.close()
+    # Forked children inherit the creator's object: only the creating process removes the block
+    if owner_pid == os.getpid():
+        try:
+            segment.unlink()
+        except FileNotFoundError:
+            pass
+
+
+class SharedPerformanceHistory(PerformanceHistory):
+    """PerformanceHistory acotado cuyo buffer y contador están en memoria compartida.
+
+    Mantiene el protocolo de un único escritor: el proceso del Object Level escribe la fila
+    y publica el contador después; los lectores de otros procesos ven vistas sin copia.
+    """
+
+    def __init__(self, buffer, counter):
+        self.max_len = len(buffer) // 2
+        self._buffer = buffer
+        self._capacity = self.max_len
+        self._counter = counter
+
+    @property
+    def _count(self):
+        return int(self._counter[0])
+
+    @_count.setter
+    def _count(self, value):
+        self._counter[0] = value
+
+
+class ProcessSharedMemory:
+    """Misma interfaz que SharedMemory, compartida entre procesos.
+
+    Al pasarla a un multiprocessing.Process se vuelve a adjuntar al mismo bloque por su
+    nombre. Las lecturas de claves numéricas no toman el lock; las escrituras, lecturas
+    versionadas y lotes sí, y las escrituras despiertan a los wait_for de cualquier proceso.
+    El proceso creador debe llamar a close() al terminar; si no lo hace, el bloque se elimina
+    cuando el objeto se recoge o al salir del intérprete.
+    """
+
+    def __init__(self, history_max_len=4096, name=None, context=None):
+        context = context or multiprocessing
+        self.history_max_len = max(1, int(history_max_len))
+        self._segment = shared_memory.SharedMemory(name=name, create=True, size=_segment_size(self.history_max_len))
+        self._name = self._segment.name
+        self._owner = True
+        self._finalizer = weakref.finalize(self, _release_segment, self._segment, os.getpid())
+        self._context = context
+        self._lock = context.Lock()
+        self._condition = context.Condition(self._lock)
+        self._local = {}
+        self._local_versions = {}
+        self._attach()
+        self._values[:] = np.nan  # NaN marks a key that was never written (read() returns None)
+        self._versions[:] = 0
+        self.history._counter[0] = 0
+
+    def _attach(self):
+        n_keys = len(NUMERIC_KEYS)
+        buffer = self._segment.buf
+        self._values = np.ndarray((n_keys,), dtype=np.float64, buffer=buffer)
+        self._versions = np.ndarray((n_keys,), dtype=np.int64, buffer=buffer, offset=8 * n_keys)
+        counter = np.ndarray((1,), dtype=np.int64, buffer=buffer, offset=16 * n_keys)
+        rows = np.ndarray((2 * self.history_max_len, 2), dtype=np.float64, buffer=buffer, offset=16 * n_keys + 8)
+        self.history = SharedPerformanceHistory(rows, counter)
+
+    @property
+    def name(self):
+        return self._name
+
+    @property
+    def closed(self):
+        return self._segment is None
+
+    def __getstate__(self):
+        if self._segment is None:
+            raise ValueError("La memoria compartida ya está cerrada.")
+        # Only the segment name travels; the child maps the same block again
+        return {"name": self._name, "history_max_len": self.history_max_len, "lock": self._lock,
+                "condition": self._condition, "local": dict(self._local), "local_versions": dict(self._local_versions)}
+
+    def __setstate__(self, state):
+        self.history_max_len = state["history_max_len"]
+        self._segment = shared_memory.SharedMemory(name=state["name"])
+        self._name = state["name"]
+        self._owner = False
+        self._finalizer = weakref.finalize(self, _release_segment, self._segment)
+        self._context = multiprocessing
+        self._lock = state["lock"]
+        self._condition = state["condition"]
+        self._local = state["local"]
+        self._local_versions = state["local_versions"]
+        self._attach()
+
+    def _get(self, key):
+        slot = _SLOTS.get(key)
+        if slot is None:
+            return self._local.get(key, None)
+        value = float(self._values[slot])
+        if value != value:  # NaN
+            return None
+        return _KEY_TYPES.get(key, float)(value)
+
+    def _version(self, key):
+        slot = _SLOTS.get(key)
+        if slot is None:
+            return self._local_versions.get(key, 0)
+        return int(self._versions[slot])
+
+    def _store(self, key, value):
+        # Caller holds the lock
+        slot = _SLOTS.get(key)
+        if slot is None:
+            self._local[key] = value
+            version = self._local_versions[key] = self._local_versions.get(key, 0) + 1
+        else:
+            self._values[slot] = np.nan if value is None else float(value)
+            version = self._versions[slot] = self._versions[slot] + 1
+        self._condition.notify_all()
+        return int(version)
+
+    def update(self, key, value):
+        """Escribe un valor y devuelve su nueva versión."""
+        with self._lock:
+            return self._store(key, value)
+
+    def read(self, key):
+        if key in _SLOTS:
+            return self._get(key)
+        with self._lock:
+            return self._get(key)
+
+    def read_versioned(self, key):
+        """Devuelve (valor, versión); la versión es 0 si la clave nunca se escribió."""
+        with self._lock:
+            return self._get(key), self._version(key)
+
+    def compare_and_swap(self, key, expected_version, value):
+        """Escribe solo si la versión actual es expected_version; devuelve (escrito, versión actual)."""
+        with self._lock:
+            version = self._version(key)
+            if version != expected_version:
+                return False, version
+            return True, self._store(key, value)
+
+    def update_many(self, values):
+        """Escribe varias claves de forma atómica; devuelve {clave: nueva versión}."""
+        with self._lock:
+            return {key: self._store(key, value) for key, value in values.items()}
+
+    def read_many(self, keys):
+        """Lee varias claves como una instantánea consistente; devuelve {clave: valor}."""
+        with self._lock:
+            return {key: self._get(key) for key in keys}
+
+    def wait_for(self, key, predicate=bool, timeout=None):
+        """Bloquea hasta que predicate(valor) se cumpla o expire el timeout; devuelve el valor actual."""
+        with self._condition:
+            self._condition.wait_for(lambda: predicate(self._get(key)), timeout)
+            return self._get(key)
+
+    def drop_waiters(self):
+        """Olvida a los procesos que esperaban en wait_for, p. ej. un hijo que murió esperando.
+
+        Un notify de multiprocessing espera a que cada proceso dormido confirme que despertó,
+        así que un proceso muerto lo bloquearía para siempre. Los hilos de este proceso que
+        ya esperaban despiertan al vencer su timeout.
+        """
+        with self._lock:
+            self._condition = self._context.Condition(self._lock)
+
+    def unlink(self):
+        """Elimina el bloque del sistema (solo el creador); las vistas ya abiertas siguen siendo válidas."""
+        if self._owner and self._segment is not None:
+            self._segment.unlink()
+            self._owner = False
+            self._finalizer.detach()
+            self._finalizer = weakref.finalize(self, _release_segment, self._segment)
+
+    def close(self):
+        """Copia valores e historial a memoria local, desmapea el bloque y, si es el creador, lo elimina.
+
+        Las lecturas siguen funcionando después sobre la copia local. Las vistas del historial
+        obtenidas antes de close() apuntan al bloque desmapeado y no deben usarse.
+        """
+        # Under the lock, so no writer is left holding a view of the block once it is unmapped
+        with self._lock:
+            if self._segment is None:
+                return
+            self._values = self._values.copy()
+            self._versions = self._versions.copy()
+            self.history._buffer = self.history._buffer.copy()
+            self.history._counter = self.history._counter.copy()
+            self._segment = None
+            self._owner = False
+            self._finalizer()
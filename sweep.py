@@ -0,0 +1,160 @@
+"""Barridos de parámetros de CARINA en paralelo sobre todos los núcleos.
+
+Cada configuración es un dict de argumentos de CARINA (time_cost_exponent_factor,
+monitoring_interval, minimum_run_time_before_stop, step_interval, max_iterations, ...)
+y se ejecuta aislada con un VirtualClock, por lo que cada sesión cuesta milisegundos.
+
+Uso:
+    python sweep.py --grid time_cost_exponent_factor=0.1,0.15,0.2 --grid monitoring_interval=0.3,0.6
+    python sweep.py --random time_cost_exponent_factor=0.05:0.3 --random minimum_run_time_before_stop=0:5 \\
+                    --samples 5000 --output sweep.npz
+"""
+import argparse
+import copy
+import itertools
+import os
+import random
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from carina_clock import VirtualClock
+from carina_loader import load_carina
+
+OUTCOME_COLUMNS = ("stopped", "stop_time", "final_quality", "net_utility", "plan_length", "monitoring_ticks")
+
+
+def grid(**axes):
+    """Producto cartesiano de valores por parámetro: grid(a=[1, 2], b=[3]) -> [{'a': 1, 'b': 3}, {'a': 2, 'b': 3}]."""
+    names = list(axes)
+    return [dict(zip(names, values)) for values in itertools.product(*(axes[name] for name in names))]
+
+
+def random_search(space, samples, seed=0):
+    """Configuraciones aleatorias: (low, high) se muestrea uniforme; una lista, por elección."""
+    rng = random.Random(seed)
+    configs = []
+    for _ in range(samples):
+        config = {}
+        for name, domain in space.items():
+            if isinstance(domain, tuple) and len(domain) == 2:
+                config[name] = rng.uniform(*domain)
+            else:
+                config[name] = rng.choice(list(domain))
+        configs.append(config)
+    return configs
+
+
+def run_configuration(config, goal="sweep"):
+    """Ejecuta una sesión CARINA simulada y devuelve sus resultados como dict de escalares."""
+    carina = load_carina()
+    if config.get("planner") is not None:
+        # Configurations may share one planner object (e.g. a whole grid axis): give each run its own copy
+        config = {**config, "planner": copy.deepcopy(config["planner"])}
+    session = carina.CARINA(clock=VirtualClock(), verbose=False, **config)
+    final_plan, plot_data = session.execute(goal)
+    stop_time = plot_data["optimal_stop_time"]
+    net_utility = plot_data["optimal_stop_utility"]
+    # The planner's own quality measure, which need not be the plan length
+    final_quality = session.shared_memory.read("current_quality")
+    return {
+        "stopped": bool(session.shared_memory.read("stop_signal")),
+        "stop_time": np.nan if stop_time is None else stop_time,
+        "final_quality": np.nan if final_quality is None else float(final_quality),
+        "net_utility": np.nan if net_utility is None else net_utility,
+        "plan_length": len(final_plan),
+        "monitoring_ticks": session.meta_level.monitoring_ticks,
+    }
+
+
+def run_sweep(configs, processes=None, chunksize=None):
+    """Ejecuta configs en un pool de procesos y devuelve una tabla columnar {columna: np.ndarray}.
+
+    Las columnas son los parámetros de las configuraciones (NaN donde una configuración no
+    fija un parámetro) seguidos de OUTCOME_COLUMNS, en el mismo orden que configs. Los
+    parámetros no numéricos (backend, planner, ...) quedan como arrays de objetos, con None
+    donde no se fijan.
+    """
+    configs = list(configs)
+    if any(config.get("backend") == "process" for config in configs):
+        # Checked here rather than failing in every worker
+        raise ValueError('El backend "process" no se puede barrer: las sesiones del barrido usan un '
+                         'VirtualClock, que solo funciona con el backend "thread".')
+    processes = processes or os.cpu_count() or 1
+    if chunksize is None:
+        chunksize = max(1, len(configs) // (processes * 8))
+    if processes == 1:
+        outcomes = [run_configuration(config) for config in configs]
+    else:
+        with ProcessPoolExecutor(max_workers=processes) as pool:
+            outcomes = list(pool.map(run_configuration, configs, chunksize=chunksize))
+
+    parameter_names = sorted({name for config in configs for name in config})
+    table = {name: _parameter_column([config.get(name) for config in configs]) for name in parameter_names}
+    for column in OUTCOME_COLUMNS:
+        table[column] = np.array([outcome[column] for outcome in outcomes])
+    return table
+
+
+def _parameter_column(values):
+    if all(value is None or isinstance(value, (int, float, np.number)) for value in values):
+        return np.array([np.nan if value is None else value for value in values], dtype=np.float64)
+    column = np.empty(len(values), dtype=object)
+    column[:] = values
+    return column
+
+
+def _parse_value(text):
+    # Integer-looking values stay int (max_iterations, history_max_len); anything else non-numeric
+    # is a string option (backend)
+    for parse in (int, float):
+        try:
+            return parse(text)
+        except ValueError:
+            pass
+    return text
+
+
+def _parse_axis(text, separator):
+    name, _, values = text.partition("=")
+    if separator == ":":
+        low, high = values.split(":")
+        return name, (float(low), float(high))
+    return name, [_parse_value(value) for value in values.split(",")]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Barrido de parámetros de control metanivel de CARINA.")
+    parser.add_argument("--grid", action="append", default=[], metavar="NAME=V1,V2",
+                        help="Eje de la rejilla (repetible).")
+    parser.add_argument("--random", action="append", default=[], metavar="NAME=LOW:HIGH",
+                        help="Rango uniforme para búsqueda aleatoria (repetible).")
+    parser.add_argument("--samples", type=int, default=1000, help="Configuraciones aleatorias con --random.")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--processes", type=int, default=None)
+    parser.add_argument("--output", default="sweep.npz", help="Tabla de resultados en formato .npz.")
+    args = parser.parse_args(argv)
+
+    configs = grid(**dict(_parse_axis(axis, ",") for axis in args.grid)) if args.grid else [{}]
+    if args.random:
+        space = dict(_parse_axis(axis, ":") for axis in args.random)
+        configs = [{**base, **sample} for base in configs
+                   for sample in random_search(space, args.samples, args.seed)]
+
+    try:
+        table = run_sweep(configs, args.processes)
+    except ValueError as error:
+        parser.error(str(error))
+    np.savez(args.output, **table)
+    print(f"Sweep: {len(configs)} configurations -> {args.output}")
+    if np.all(np.isnan(table["net_utility"])):
+        # nanargmax raises on an all-NaN column
+        print("No configuration stopped.")
+        return
+    best = int(np.nanargmax(table["net_utility"]))
+    print("Best net utility:", {name: column[best] if column.dtype == object else float(column[best])
+                                for name, column in table.items()})
+
+
+if __name__ == "__main__":
+    main()
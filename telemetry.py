@@ -0,0 +1,133 @@
+import numpy as np
+
+
+class TelemetryRecorder:
+    """Telemetría del Meta Level en columnas NumPy preasignadas, en lugar de listas de floats.
+
+    Se usa como el antiguo dict plot_data: recorder["times"] devuelve una vista de solo
+    lectura sin copia y recorder["optimal_stop_time"] los datos del punto de parada.
+
+    Con max_points la memoria queda acotada: al llenarse se conserva uno de cada dos puntos
+    y, a partir de ahí, solo se registra uno de cada `stride` ciclos (decimación).
+    """
+    __slots__ = ("max_points", "stride", "optimal_stop_time", "optimal_stop_utility", "optimal_stop_quality",
+                 "_data", "_count", "_offered")
+
+    COLUMNS = ("times", "qualities", "intrinsic_values", "time_costs", "total_utilities")
+    STOP_FIELDS = ("optimal_stop_time", "optimal_stop_utility", "optimal_stop_quality")
+    _INDEX = {name: i for i, name in enumerate(COLUMNS)}
+
+    def __init__(self, capacity=256, max_points=None):
+        if max_points is not None:
+            max_points = max(2, int(max_points))
+            capacity = max_points
+        self.max_points = max_points
+        self.stride = 1  # Record one of every `stride` offered samples
+        self.optimal_stop_time = None
+        self.optimal_stop_utility = None
+        self.optimal_stop_quality = None
+        self._data = np.empty((len(self.COLUMNS), max(int(capacity), 1)), dtype=np.float64)
+        self._count = 0
+        self._offered = 0
+
+    def record(self, time, quality, intrinsic_value, time_cost, total_utility):
+        """Registra un ciclo de monitorización (puede descartarse por la decimación)."""
+        offered = self._offered
+        self._offered = offered + 1
+        if offered % self.stride:
+            return
+        count = self._count
+        if count == self._data.shape[1]:
+            if self.max_points is not None:
+                # Decimate in place: keep every other point and halve the sampling rate from now on
+                kept = (count + 1) // 2
+                self._data[:, :kept] = self._data[:, 0:count:2]
+                self._count = count = kept
+                self.stride *= 2
+                if offered % self.stride:
+                    return
+            else:
+                grown = np.empty((self._data.shape[0], 2 * count), dtype=np.float64)
+                grown[:, :count] = self._data[:, :count]
+                self._data = grown
+        self._data[:, count] = (time, quality, intrinsic_value, time_cost, total_utility)
+        self._count = count + 1
+
+    def __len__(self):
+        return self._count
+
+    def column(self, name):
+        """Vista de solo lectura (sin copia) de una columna."""
+        view = self._data[self._INDEX[name], :self._count]
+        view.flags.writeable = False
+        return view
+
+    def as_arrays(self):
+        return {name: self.column(name) for name in self.COLUMNS}
+
+    def __getitem__(self, key):
+        if key in self._INDEX:
+            return self.column(key)
+        if key in self.STOP_FIELDS:
+            return getattr(self, key)
+        raise KeyError(key)
+
+    def __setitem__(self, key, value):
+        if key not in self.STOP_FIELDS:
+            raise KeyError(f"Solo se pueden asignar {self.STOP_FIELDS}; las columnas se escriben con record().")
+        setattr(self, key, value)
+
+    def get(self, key, default=None):
+        try:
+            return self[key]
+        except KeyError:
+            return default
+
+    def keys(self):
+        return self.COLUMNS + self.STOP_FIELDS
+
+    def __contains__(self, key):
+        return key in self._INDEX or key in self.STOP_FIELDS
+
+    def rows(self, start=0):
+        """Copia (n, 5) de los puntos desde start, con las columnas en el orden de COLUMNS."""
+        return self._data[:, start:self._count].T.copy()
+
+    def load_rows(self, start, rows, stride=None, offered=None):
+        """Sustituye los puntos desde start por rows (n, 5); sirve para restaurar un checkpoint."""
+        rows = np.asarray(rows, dtype=np.float64).reshape(-1, len(self.COLUMNS))
+        count = start + len(rows)
+        if self.max_points is not None and count > self.max_points:
+            raise ValueError(f"{count} puntos no caben en max_points={self.max_points}.")
+        if count > self._data.shape[1]:
+            grown = np.empty((self._data.shape[0], max(count, 2 * self._data.shape[1])), dtype=np.float64)
+            grown[:, :self._count] = self._data[:, :self._count]
+            self._data = grown
+        self._data[:, start:count] = rows.T
+        self._count = count
+        if stride is not None:
+            self.stride = int(stride)
+        self._offered = int(offered) if offered is not None else count * self.stride
+
+    def save(self, path, compressed=False):
+        """Guarda las columnas y el punto de parada en un .npz (NaN donde el punto no existe)."""
+        stop = np.array([np.nan if value is None else value for value in
+                         (self.optimal_stop_time, self.optimal_stop_utility, self.optimal_stop_quality)])
+        writer = np.savez_compressed if compressed else np.savez
+        writer(path, stride=self.stride, optimal_stop=stop, **self.as_arrays())
+
+    @classmethod
+    def load(cls, path, max_points=None):
+        with np.load(path) as archive:
+            count = len(archive["times"])
+            recorder = cls(capacity=max(count, 1), max_points=max_points)
+            if max_points is not None and count > recorder._data.shape[1]:
+                raise ValueError(f"El archivo tiene {count} puntos, más que max_points={max_points}.")
+            for i, name in enumerate(cls.COLUMNS):
+                recorder._data[i, :count] = archive[name]
+            recorder._count = count
+            recorder.stride = int(archive["stride"])
+            recorder._offered = count * recorder.stride
+            for name, value in zip(cls.STOP_FIELDS, archive["optimal_stop"]):
+                setattr(recorder, name, None if np.isnan(value) else float(value))
+        return recorder
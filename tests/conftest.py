@@ -0,0 +1,10 @@
+import os
+import sys
+
+# The modules are flat scripts at the repository root and in cognitive-functions/
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+for path in (ROOT, os.path.join(ROOT, "cognitive-functions")):
+    if path not in sys.path:
+        sys.path.insert(0, path)
+
+os.environ.setdefault("MPLBACKEND", "Agg")
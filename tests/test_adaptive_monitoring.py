@@ -0,0 +1,27 @@
+import pytest
+
+from carina_clock import VirtualClock
+from carina_loader import load_carina
+
+carina = load_carina()
+
+
+def _run(adaptive, step_interval, cost_factor):
+    session = carina.CARINA(clock=VirtualClock(), verbose=False, adaptive_interval=adaptive, max_iterations=10_000,
+                            step_interval=step_interval, time_cost_exponent_factor=cost_factor)
+    _, plot_data = session.execute("adaptive")
+    return session, plot_data["optimal_stop_time"]
+
+
+@pytest.mark.parametrize("step_interval", [0.5, 0.1, 0.05])
+@pytest.mark.parametrize("cost_factor", [0.05, 0.15, 0.3, 0.6, 1.5])
+def test_adaptive_never_stops_later_than_fixed(step_interval, cost_factor):
+    fixed, fixed_stop = _run(False, step_interval, cost_factor)
+    adaptive, adaptive_stop = _run(True, step_interval, cost_factor)
+    # Up to the microsecond margin adaptive ticks take past minimum_run_time_before_stop
+    assert adaptive_stop <= fixed_stop + 1e-5
+    optimum = float(adaptive.meta_level.optimal_stopping_time())
+    if optimum > adaptive.meta_level.minimum_run_time_before_stop:
+        assert adaptive_stop <= optimum + 1e-5
+    if fixed.meta_level.monitoring_ticks > 10:
+        assert adaptive.meta_level.monitoring_ticks < fixed.meta_level.monitoring_ticks
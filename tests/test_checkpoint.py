@@ -0,0 +1,156 @@
+import numpy as np
+import pytest
+
+from carina_clock import VirtualClock
+from carina_loader import load_carina
+from checkpoint import MAGIC, read_checkpoint
+from planners import AnytimeWeightedAStarPlanner, CurriculumGraph
+
+carina = load_carina()
+
+GOAL = "checkpoint"
+OPTIONS = {"verbose": False, "max_iterations": 60}
+
+
+class Crash(Exception):
+    pass
+
+
+def _session(**options):
+    return carina.CARINA(clock=VirtualClock(), **{**OPTIONS, **options})
+
+
+def _crash_after(session, ticks):
+    calls = [0]
+
+    def on_tick(plot_data):
+        calls[0] += 1
+        if calls[0] == ticks:
+            raise Crash
+
+    session.meta_level.tick_listeners.append(on_tick)
+
+
+def _assert_matches(checkpoint, session, final_plan):
+    history = session.shared_memory.history.snapshot()
+    np.testing.assert_array_equal(checkpoint["history"], history)
+    assert np.all(np.diff(checkpoint["history"][:, 0]) > 0)
+    assert checkpoint["plan"] == final_plan
+    assert len(checkpoint["telemetry"]) == len(session.meta_level.plot_data)
+    assert checkpoint["state"]["meta_level"]["monitoring_ticks"] == session.meta_level.monitoring_ticks
+
+
+def test_checkpoint_records_the_whole_run(tmp_path):
+    path = tmp_path / "session.ck"
+    session = _session()
+    session.checkpoint_to(path)
+    final_plan, _ = session.execute(GOAL)
+    assert path.read_bytes().startswith(MAGIC)
+    _assert_matches(read_checkpoint(path), session, final_plan)
+
+
+def test_fresh_session_overwrites_an_existing_checkpoint(tmp_path):
+    path = tmp_path / "session.ck"
+    first = _session()
+    first.checkpoint_to(path)
+    first.execute(GOAL)
+
+    second = _session(max_iterations=10, minimum_run_time_before_stop=float("inf"))
+    second.checkpoint_to(path)
+    final_plan, _ = second.execute(GOAL)
+    _assert_matches(read_checkpoint(path), second, final_plan)
+
+
+def test_write_resume_write_round_trip(tmp_path):
+    reference = _session()
+    reference_plan, reference_data = reference.execute(GOAL)
+
+    path = tmp_path / "session.ck"
+    interrupted = _session()
+    interrupted.checkpoint_to(path)
+    _crash_after(interrupted, 5)
+    with pytest.raises(Crash):
+        interrupted.execute(GOAL)
+    saved = read_checkpoint(path)
+    assert 0 < len(saved["history"]) < len(reference.shared_memory.history)
+
+    resumed = carina.CARINA.resume(path, clock=VirtualClock(), **OPTIONS)
+    resumed.checkpoint_to(path)
+    final_plan, plot_data = resumed.execute(GOAL)
+
+    checkpoint = read_checkpoint(path)
+    _assert_matches(checkpoint, resumed, final_plan)
+    np.testing.assert_array_equal(checkpoint["history"][:len(saved["history"])], saved["history"])
+    assert final_plan == reference_plan
+    assert plot_data["optimal_stop_time"] == pytest.approx(reference_data["optimal_stop_time"])
+
+
+def test_truncated_last_record_is_ignored(tmp_path):
+    path = tmp_path / "session.ck"
+    session = _session()
+    checkpointer = session.checkpoint_to(path)
+    session.execute(GOAL)
+    complete = read_checkpoint(path)
+
+    size = path.stat().st_size
+    checkpointer.write()  # One more S record, then cut it in half
+    with open(path, "r+b") as file:
+        file.truncate(size + (path.stat().st_size - size) // 2)
+    truncated = read_checkpoint(path)
+    np.testing.assert_array_equal(truncated["history"], complete["history"])
+    assert truncated["state"] == complete["state"]
+
+
+def test_resume_needs_a_checkpoint(tmp_path):
+    path = tmp_path / "other.bin"
+    path.write_bytes(b"not a checkpoint")
+    with pytest.raises(ValueError):
+        carina.CARINA.resume(path, clock=VirtualClock(), **OPTIONS)
+
+
+def test_process_backend_cannot_checkpoint(tmp_path):
+    with carina.CARINA(verbose=False, backend="process") as session:
+        with pytest.raises(ValueError):
+            session.checkpoint_to(tmp_path / "session.ck")
+
+
+def test_resume_uses_the_saved_configuration(tmp_path):
+    path = tmp_path / "session.ck"
+    options = {"step_interval": 0.1, "monitoring_interval": 0.25, "time_cost_exponent_factor": 0.3,
+               "minimum_run_time_before_stop": 1.0, "adaptive_interval": True}
+    interrupted = _session(**options)
+    interrupted.checkpoint_to(path)
+    _crash_after(interrupted, 3)
+    with pytest.raises(Crash):
+        interrupted.execute(GOAL)
+
+    resumed = carina.CARINA.resume(path, clock=VirtualClock(), verbose=False)
+    assert resumed.options == interrupted.options
+    assert resumed.meta_level.monitoring_interval == 0.25
+    assert resumed.object_level.step_interval == 0.1
+
+
+def test_resume_rejects_conflicting_options(tmp_path):
+    path = tmp_path / "session.ck"
+    session = _session(time_cost_exponent_factor=0.3)
+    session.checkpoint_to(path)
+    session.execute(GOAL)
+    with pytest.raises(ValueError, match="time_cost_exponent_factor"):
+        carina.CARINA.resume(path, clock=VirtualClock(), verbose=False, time_cost_exponent_factor=0.5)
+
+
+def test_resume_rebuilds_the_planner(tmp_path):
+    graph = CurriculumGraph.from_activities(["a", "b", "c", "d"], [0.0, 2.0, 1.0, 3.0], {"d": ["b"]})
+    path = tmp_path / "session.ck"
+    session = _session(planner=AnytimeWeightedAStarPlanner(graph, targets=["c", "d"], expansions_per_step=1))
+    session.checkpoint_to(path)
+    session.execute(GOAL)
+
+    resumed = carina.CARINA.resume(path, clock=VirtualClock(), verbose=False)
+    planner = resumed.object_level.planner
+    assert isinstance(planner, AnytimeWeightedAStarPlanner)
+    assert planner.config() == session.object_level.planner.config()
+
+    other = AnytimeWeightedAStarPlanner(graph, weight=3.0)
+    with pytest.raises(ValueError):
+        carina.CARINA.resume(path, clock=VirtualClock(), verbose=False, planner=other)
@@ -0,0 +1,85 @@
+import numpy as np
+import pytest
+
+from carina_clock import VirtualClock
+from performance_predictor import OnlinePerformancePredictor, optimal_stopping_time
+
+CASES = 300
+GRID_POINTS = 40001
+
+
+def _quality(family, a, b, t, t_last, q_last, mean_rate):
+    if family == "log_linear":
+        return np.expm1(a + b * t)
+    if family == "power_law":
+        return np.expm1(a + b * np.log1p(t))
+    rate = -b
+    if rate <= 0:
+        return q_last + mean_rate * (t - t_last)
+    asymptote = a / rate
+    return asymptote - (asymptote - q_last) * np.exp(-rate * (t - t_last))
+
+
+def _parameters(family, rng):
+    c = rng.uniform(0.05, 0.5, CASES)
+    t_last = rng.uniform(0.0, 5.0, CASES)
+    q_last = np.zeros(CASES)
+    mean_rate = np.zeros(CASES)
+    if family == "power_law":
+        # Both sides of b = 1: convex and concave first-order conditions
+        a = rng.uniform(0.0, 3.0, CASES)
+        b = rng.uniform(0.2, 1.8, CASES)
+    elif family == "log_linear":
+        a = rng.uniform(0.0, 2.0, CASES)
+        b = c * rng.uniform(0.0, 0.95, CASES)  # b < c keeps the optimum finite
+    else:
+        rate = rng.uniform(-0.2, 1.0, CASES)
+        q_last = rng.uniform(0.0, 10.0, CASES)
+        asymptote = q_last + rng.uniform(-2.0, 30.0, CASES)
+        a = asymptote * rate
+        b = -rate
+        mean_rate = rng.uniform(0.0, 3.0, CASES)
+    return a, b, c, t_last, q_last, mean_rate
+
+
+@pytest.mark.parametrize("family", ["power_law", "log_linear", "saturating_exponential"])
+def test_optimal_stopping_time_matches_grid_search(family):
+    rng = np.random.default_rng(5)
+    a, b, c, t_last, q_last, mean_rate = _parameters(family, rng)
+    solved = optimal_stopping_time(family, a, b, c, t_last, q_last, mean_rate)
+    assert np.all(np.isfinite(solved)) and np.all(solved >= t_last)
+
+    for i in range(CASES):
+        args = (family, a[i], b[i])
+        # The grid reaches well past the solved optimum, so a late answer is caught too
+        times = np.linspace(t_last[i], 2 * solved[i] + 20.0, GRID_POINTS)
+        utility = _quality(*args, times, t_last[i], q_last[i], mean_rate[i]) - np.expm1(c[i] * times)
+        solved_utility = _quality(*args, solved[i], t_last[i], q_last[i], mean_rate[i]) - np.expm1(c[i] * solved[i])
+        best = utility.max()
+        assert solved_utility >= best - 1e-6 * max(1.0, abs(best)), (i, a[i], b[i], c[i], t_last[i])
+
+
+@pytest.mark.parametrize("step_interval", [0.02, 0.05, 0.1, 0.5])
+@pytest.mark.parametrize("slope", [1.0, 20.0, 50.0])
+def test_linear_ramp_projects_its_slope(step_interval, slope):
+    # StepCountPlanner's ramp: the fitted saturation rate is float noise around zero
+    clock = VirtualClock()
+    predictor = OnlinePerformancePredictor("saturating_exponential", forgetting=0.9)
+    for _ in range(50):
+        clock.sleep(step_interval)
+        predictor.update(clock.time(), slope * clock.time())
+    now = clock.time()
+    for horizon in (0.06, 0.6, 6.0):
+        assert predictor.projected_gain(now, horizon) == pytest.approx(slope * horizon, rel=1e-6)
+    times = now + np.array([0.0, 0.06, 0.6, 6.0])
+    np.testing.assert_allclose(predictor.predict_many(times), [predictor.predict(t) for t in times], rtol=1e-12)
+
+
+def test_linear_ramp_does_not_stop_at_the_first_allowed_tick():
+    from carina_loader import load_carina
+
+    session = load_carina().CARINA(clock=VirtualClock(), step_interval=0.05, monitoring_interval=0.06,
+                                   minimum_run_time_before_stop=0.2, time_cost_exponent_factor=1.5, verbose=False)
+    _, plot_data = session.execute("ramp")
+    # Marginal gain 20 q/s meets the marginal cost 1.5 e^(1.5 t) near t = 1.7 s
+    assert plot_data["optimal_stop_time"] == pytest.approx(1.74, abs=0.1)
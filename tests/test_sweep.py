@@ -0,0 +1,27 @@
+import numpy as np
+import pytest
+
+import sweep
+
+
+def test_process_backend_is_rejected_before_running(monkeypatch):
+    def run_configuration(config, goal="sweep"):
+        raise AssertionError("no configuration should run")
+
+    monkeypatch.setattr(sweep, "run_configuration", run_configuration)
+    with pytest.raises(ValueError, match="process"):
+        sweep.run_sweep(sweep.grid(backend=["thread", "process"]), processes=1)
+
+
+def test_command_line_rejects_the_process_backend(tmp_path, capsys):
+    with pytest.raises(SystemExit):
+        sweep.main(["--grid", "backend=process", "--output", str(tmp_path / "sweep.npz"), "--processes", "1"])
+    assert "process" in capsys.readouterr().err
+
+
+def test_no_stopped_configuration_is_reported(tmp_path, capsys):
+    output = tmp_path / "sweep.npz"
+    # Without a single planning step no tick records a stop point
+    sweep.main(["--grid", "max_iterations=0", "--output", str(output), "--processes", "1"])
+    assert "No configuration stopped." in capsys.readouterr().out
+    assert np.all(np.isnan(np.load(output)["net_utility"]))
@@ -0,0 +1,8 @@
+import argparse
+
+from CARINA import main
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Ejecuta una sesión del agente CARINA o5.")
+    parser.add_argument("goal", nargs="?", default="Aprender inteligencia artificial", help="Objetivo de aprendizaje.")
+    main(parser.parse_args().goal)